@@ -0,0 +1,164 @@
+"""
+Static asset pipeline.
+
+Builds the stylesheet with the Tailwind CLI (with daisyUI), keeping only the classes the
+templates use, into static/ under a content-hashed name, precompressed with gzip and
+(when the optional brotli package, the brotli extra, is installed) brotli:
+
+    npm install
+    python assets.py
+
+static/manifest.json maps each source name to its built file ({"app.css": "app.1a2b3c4d5e6f.css"})
+and is what the templates link to. Without a manifest the templates fall back to the CDN.
+
+PrecompressedStaticFiles serves the built files with the precompressed variant the browser
+accepts and, since their names change with their content, with immutable cache headers.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import subprocess
+import sys
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+try:
+    # brotli is optional, without it only gzip variants are built
+    import brotli
+except ImportError:
+    brotli = None
+
+SOURCE_DIR = "styles"
+STATIC_DIR = "static"
+MANIFEST = "manifest.json"
+# Compressed variants, in order of preference, as (content coding, file suffix)
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def compress(path, data):
+    with open(path + ".gz", "wb") as f:
+        # mtime=0 keeps the output the same for the same input
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + ".br", "wb") as f:
+            f.write(brotli.compress(data, quality=11))
+
+
+def build_css(source, minify=True):
+    """
+    Returns the CSS built from `source` by the Tailwind CLI.
+    """
+    command = ["npx", "--no-install", "@tailwindcss/cli", "-i", source, "-o", "-"]
+    if minify:
+        command.append("--minify")
+    return subprocess.run(command, capture_output=True, check=True).stdout
+
+
+def build(static_dir=STATIC_DIR, source_dir=SOURCE_DIR):
+    """
+    Builds every stylesheet in `source_dir` into `static_dir`, returning the manifest.
+    Files from earlier builds are removed.
+    """
+    manifest_path = os.path.join(static_dir, MANIFEST)
+    old = load_manifest(static_dir)
+    manifest = {}
+    for name in sorted(os.listdir(source_dir)):
+        if not name.endswith(".css"):
+            continue
+        data = build_css(os.path.join(source_dir, name))
+        stem, extension = os.path.splitext(name)
+        built = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{extension}"
+        path = os.path.join(static_dir, built)
+        with open(path, "wb") as f:
+            f.write(data)
+        compress(path, data)
+        manifest[name] = built
+        print(f"{name} -> {built} ({len(data):,} bytes)", file=sys.stderr)
+
+    for built in set(old.values()) - set(manifest.values()):
+        for suffix in ("", ".gz", ".br"):
+            path = os.path.join(static_dir, built + suffix)
+            if os.path.exists(path):
+                os.remove(path)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_manifest(static_dir=STATIC_DIR):
+    """
+    Returns the manifest of built assets, or {} if they haven't been built.
+    """
+    try:
+        with open(os.path.join(static_dir, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def accepted_encodings(header):
+    """
+    Returns {content coding: q} for an Accept-Encoding header, q being 1 when not given and 0
+    (not accepted) when it isn't a number.
+    """
+    codings = {}
+    for part in header.lower().split(","):
+        coding, *params = part.split(";")
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding.strip():
+            codings[coding.strip()] = q
+    return codings
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves a file's .br or .gz variant when the client accepts it, and
+    marks content-hashed files (the ones in the manifest) as cacheable forever.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.immutable = set(load_manifest(self.directory).values())
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        request_headers = Headers(scope=scope)
+        codings = accepted_encodings(request_headers.get("accept-encoding", ""))
+        # "*" stands for the codings the header doesn't name
+        quality = {x: codings.get(x, codings.get("*", 0.0)) for x, _ in ENCODINGS}
+        response = None
+        # The highest q first, then in order of preference (sorted is stable)
+        for coding, suffix in sorted(ENCODINGS, key=lambda x: -quality[x[0]]):
+            if quality[coding] > 0 and os.path.isfile(full_path + suffix):
+                response = FileResponse(
+                    full_path + suffix,
+                    status_code=status_code,
+                    stat_result=os.stat(full_path + suffix),
+                    # The type of the original, not of the compressed file
+                    media_type=mimetypes.guess_type(full_path)[0],
+                )
+                response.headers["content-encoding"] = coding
+                if self.is_not_modified(response.headers, request_headers):
+                    response = NotModifiedResponse(response.headers)
+                break
+        if response is None:
+            response = super().file_response(full_path, stat_result, scope, status_code)
+        response.headers["vary"] = "Accept-Encoding"
+        if os.path.basename(full_path) in self.immutable:
+            response.headers["cache-control"] = "public, max-age=31536000, immutable"
+        return response
+
+
+if __name__ == "__main__":
+    build()
@@ -0,0 +1,213 @@
+"""
+Attempt log.
+
+Every graded answer is recorded with its game, question, answer, correctness and latency, to
+tune the games with. Recording only appends to an in-memory ring buffer, so it never blocks the
+event loop. A background task takes the buffered attempts every `flush_interval` seconds and
+writes them in one batch, from a thread, to JSON lines. When the buffer is full (the disk can't
+keep up), the oldest attempts are dropped and counted. A batch that fails to write is counted
+and logged, and the next one is written as usual.
+
+Each process writes its own file, attempts-<pid>.jsonl in the log directory, so workers never
+interleave lines. Once a file reaches `max_bytes` it is renamed to
+attempts-<pid>-<milliseconds>.jsonl and a new one is started.
+
+The reader memory-maps every .jsonl file in the directory and counts attempts and errors per
+game and per question by counting line prefixes with a regex, decoding only the distinct ones:
+
+    python attempts.py logs/
+    python attempts.py logs/ --top 50 --min-attempts 20
+"""
+
+import argparse
+import asyncio
+import contextlib
+import glob
+import json
+import logging
+import mmap
+import os
+import re
+import sys
+import time
+from collections import Counter, deque
+
+# Lines start with these keys in this order (written by json.dumps with its default separators).
+# The reader counts these prefixes as they are and only decodes the distinct ones.
+LINE = re.compile(
+    rb'\{"game": "[^"\\]*(?:\\.[^"\\]*)*", "question": "[^"\\]*(?:\\.[^"\\]*)*", '
+    rb'"correct": (?:true|false)'
+)
+# Bytes of a log scanned at a time, which bounds the matches held in memory
+SCAN_BYTES = 32 * 1024 * 1024
+
+
+class AttemptLog:
+    """
+    Buffers attempts in memory (at most `capacity`) and writes them to `directory` from a
+    background task. Call start() from a running event loop and close() on shutdown.
+    """
+
+    def __init__(
+        self, directory, max_bytes=64 * 1024 * 1024, capacity=65536, flush_interval=1.0
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.buffer = deque(maxlen=capacity)
+        self.dropped = 0
+        # Attempts lost to batches that failed to write
+        self.failed = 0
+        self.path = os.path.join(directory, f"attempts-{os.getpid()}.jsonl")
+        self.task = None
+        os.makedirs(directory, exist_ok=True)
+
+    def record(self, game, question, answer, correct, latency):
+        """
+        Queues one attempt, `latency` being the seconds from asking to answering.
+        """
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        self.buffer.append(
+            (game, question, correct, answer, round(latency, 3), time.time())
+        )
+
+    def write(self, batch):
+        text = "".join(
+            json.dumps(
+                {
+                    "game": game,
+                    "question": question,
+                    "correct": correct,
+                    "answer": answer,
+                    "latency": latency,
+                    "time": round(when, 3),
+                },
+                ensure_ascii=False,
+            )
+            + "\n"
+            for game, question, correct, answer, latency, when in batch
+        )
+        # Lone surrogates (a client can send them) can't be encoded, they are written escaped
+        # (\ud800), which decodes back to the same string
+        lines = text.encode(errors="backslashreplace")
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            size = 0
+        if size and size + len(lines) > self.max_bytes:
+            stem, extension = os.path.splitext(self.path)
+            os.rename(self.path, f"{stem}-{time.time_ns() // 1000000}{extension}")
+        with open(self.path, "ab") as f:
+            f.write(lines)
+
+    async def flush(self):
+        """
+        Writes every buffered attempt in one batch.
+        """
+        if not self.buffer:
+            return
+        batch = [self.buffer.popleft() for _ in range(len(self.buffer))]
+        await asyncio.to_thread(self.write, batch)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            batch = len(self.buffer)
+            try:
+                await self.flush()
+            except Exception:
+                self.failed += batch
+                logging.getLogger(__name__).exception(
+                    "failed to write %d attempts to %s", batch, self.path
+                )
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    async def close(self):
+        """
+        Stops the background task and writes what's left.
+        """
+        if self.task is not None:
+            self.task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.task
+        await self.flush()
+
+
+def count(paths):
+    """
+    Returns a Counter of the line prefixes (game, question and correct as JSON) in the log files.
+    """
+    counts = Counter()
+    for path in paths:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                continue
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                start = 0
+                while start < len(data):
+                    stop = data.find(b"\n", start + SCAN_BYTES) + 1 or len(data)
+                    counts.update(LINE.findall(data, start, stop))
+                    start = stop
+    return counts
+
+
+def error_rates(paths):
+    """
+    Returns ({game: (attempts, errors)}, {(game, question): (attempts, errors)}).
+    """
+    games = {}
+    items = {}
+    for prefix, n in count(paths).items():
+        attempt = json.loads(prefix + b"}")
+        game = attempt["game"]
+        wrong = 0 if attempt["correct"] else n
+        attempts, errors = games.get(game, (0, 0))
+        games[game] = attempts + n, errors + wrong
+        key = game, attempt["question"]
+        attempts, errors = items.get(key, (0, 0))
+        items[key] = attempts + n, errors + wrong
+    return games, items
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Error rates per game and per question from the attempt logs"
+    )
+    parser.add_argument("directory", help="directory the attempts were logged to")
+    parser.add_argument("--top", type=int, default=20, help="questions to show")
+    parser.add_argument(
+        "--min-attempts",
+        type=int,
+        default=10,
+        help="leave out questions with fewer attempts",
+    )
+    args = parser.parse_args()
+
+    began = time.perf_counter()
+    games, items = error_rates(glob.glob(os.path.join(args.directory, "*.jsonl")))
+    total = sum(attempts for attempts, _ in games.values())
+    print(
+        f"{total:,} attempts read in {time.perf_counter() - began:.2f}s",
+        file=sys.stderr,
+    )
+
+    print(f"{'game':<24} {'attempts':>10} {'error rate':>10}")
+    for game, (attempts, errors) in sorted(
+        games.items(), key=lambda x: x[1][1] / x[1][0], reverse=True
+    ):
+        print(f"{game:<24} {attempts:>10,} {errors / attempts:>10.1%}")
+
+    print(f"\nMost missed questions (at least {args.min_attempts} attempts):")
+    hardest = sorted(
+        (
+            (errors / attempts, attempts, game, question)
+            for (game, question), (attempts, errors) in items.items()
+            if attempts >= args.min_attempts
+        ),
+        reverse=True,
+    )
+    for rate, attempts, game, question in hardest[: args.top]:
+        print(f"{rate:>6.1%} {attempts:>8,}  {game}: {question}")
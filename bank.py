@@ -0,0 +1,210 @@
+"""
+Precompiled question bank.
+
+Every registered game is expanded ahead of time into its (question, answers) pairs, which are
+written to one memory-mappable file, so serving a question is just two random indexes.
+
+File layout (unsigned 32-bit integers in the byte order recorded in the header):
+
+    b"JNQB" | version | header length | JSON header, padded to 4 bytes
+    per game: entry offsets (entries + 1) | slots (entry number for each slot)
+    UTF-8 blob of entries, each "question\\x1fanswer\\x1fanswer..."
+
+Games whose choices can be walked exhaustively get one slot per unit of probability (an entry
+twice as likely gets twice the slots), games with too many outcomes are sampled instead.
+Drawing a game uniformly and then a slot uniformly keeps the same odds as calling the games.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import mmap
+import random
+import sys
+from array import array
+from fractions import Fraction
+
+MAGIC = b"JNQB"
+VERSION = 2
+SEPARATOR = "\x1f"
+
+
+class ChoiceTracer:
+    """
+    Stands in for the random module, following a fixed path of choices and picking the first
+    option past the end of it. It records how many options each choice had.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.branches = []
+
+    def pick(self, count):
+        position = len(self.branches)
+        if position == len(self.path):
+            self.path.append(0)
+        self.branches.append(count)
+        return self.path[position]
+
+    def choice(self, seq):
+        return seq[self.pick(len(seq))]
+
+    def randint(self, a, b):
+        return a + self.pick(b - a + 1)
+
+
+def enumerate_game(func, limit):
+    """
+    Walks every path of choices a game can make, returning [(probability, (question, answers))],
+    or None when the game has more than `limit` outcomes.
+    """
+    outcomes = []
+    path = []
+    while True:
+        tracer = ChoiceTracer(path)
+        question, answers = func(tracer)
+        outcomes.append((Fraction(1, math.prod(tracer.branches)), (question, answers)))
+        if len(outcomes) > limit:
+            return None
+        # Move on to the next path, like an odometer
+        while path and path[-1] + 1 == tracer.branches[len(path) - 1]:
+            path.pop()
+        if not path:
+            return outcomes
+        path[-1] += 1
+
+
+def encode(question, answers):
+    return SEPARATOR.join([question, *map(str, answers)]).encode()
+
+
+def compile_game(func, samples, limit, rng=random):
+    """
+    Returns (entries, slots) for a game: the distinct encoded entries and the entry for each slot.
+    """
+    outcomes = enumerate_game(func, limit)
+    if outcomes is not None:
+        scale = math.lcm(*(p.denominator for p, _ in outcomes))
+        if scale <= limit:
+            entries = {}
+            slots = array("I")
+            for probability, outcome in outcomes:
+                entry = entries.setdefault(encode(*outcome), len(entries))
+                slots.extend([entry] * int(probability * scale))
+            return list(entries), slots
+    # Too many outcomes to list with their odds, sample the game instead
+    entries = {}
+    slots = array("I")
+    for _ in range(samples):
+        slots.append(entries.setdefault(encode(*func(rng)), len(entries)))
+    return list(entries), slots
+
+
+def build(games, path, samples=65536, limit=100000):
+    """
+    Compiles every game in `games` and writes the bank to `path`.
+    """
+    compiled = [(func.__name__, *compile_game(func, samples, limit)) for func in games]
+
+    header = {"byteorder": sys.byteorder, "games": []}
+    arrays = []
+    blob = bytearray()
+    position = 0  # from the end of the header
+    for name, entries, slots in compiled:
+        offsets = array("I", [len(blob)])
+        for entry in entries:
+            blob += entry
+            offsets.append(len(blob))
+        header["games"].append(
+            {
+                "name": name,
+                "entries": len(entries),
+                "slots": len(slots),
+                "offsets": position,
+                "index": position + len(offsets) * 4,
+            }
+        )
+        arrays += offsets, slots
+        position += (len(offsets) + len(slots)) * 4
+    header["blob"] = position
+    # Identifies the bank's contents, so question tokens can be tied to the bank they were drawn from
+    digest = hashlib.sha256(blob)
+    for x in arrays:
+        digest.update(x.tobytes())
+    header["id"] = digest.hexdigest()[:32]
+
+    encoded = json.dumps(header).encode()
+    encoded += b" " * (-len(encoded) % 4)
+    with open(path, "wb") as f:
+        f.write(MAGIC + array("I", [VERSION, len(encoded)]).tobytes() + encoded)
+        for x in arrays:
+            f.write(x.tobytes())
+        f.write(blob)
+    return header
+
+
+class QuestionBank:
+    """
+    Read-only view of a compiled bank, memory-mapped so worker processes share the pages.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.mm)
+        version, length = view[4:12].cast("I")
+        if bytes(view[:4]) != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} question bank")
+        header = json.loads(bytes(view[12 : 12 + length]))
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was built with {header['byteorder']} byte order")
+        self.id = header["id"]
+        data = view[12 + length :]
+        self.blob = data[header["blob"] :]
+        self.games = []
+        for game in header["games"]:
+            offsets = data[game["offsets"] : game["index"]].cast("I")
+            slots = data[game["index"] : game["index"] + game["slots"] * 4].cast("I")
+            self.games.append((game["name"], offsets, slots))
+
+    def entry(self, game, entry):
+        name, offsets, _ = self.games[game]
+        question, *answers = str(
+            self.blob[offsets[entry] : offsets[entry + 1]], "utf-8"
+        ).split(SEPARATOR)
+        return name, question, tuple(answers)
+
+    def draw(self, rng=random):
+        """
+        Returns (game name, question, answers) for a random game and question.
+        """
+        game = rng.randrange(len(self.games))
+        slots = self.games[game][2]
+        return self.entry(game, slots[rng.randrange(len(slots))])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compile the question bank for every game"
+    )
+    parser.add_argument("-o", "--output", default="question_bank.bin")
+    parser.add_argument(
+        "--samples",
+        type=int,
+        default=65536,
+        help="draws for games that can't be listed",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=100000,
+        help="most outcomes/slots to list for one game",
+    )
+    args = parser.parse_args()
+
+    from games import games
+
+    header = build(games, args.output, args.samples, args.limit)
+    for game in header["games"]:
+        print(f"{game['name']}: {game['entries']} questions, {game['slots']} slots")
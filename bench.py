@@ -0,0 +1,251 @@
+"""
+Benchmarks for the converter, the game generators and the quiz page.
+
+Each benchmark is timed call by call for `--time` seconds (after a short warm-up), and reported
+as ops/sec with p50/p95/p99 latencies. Results can be saved as a JSON baseline and compared
+against later, failing (exit 1) when a benchmark's ops/sec dropped by more than `--threshold`:
+
+    python bench.py --save bench_baseline.json       # record a baseline
+    python bench.py --compare bench_baseline.json    # fail on regressions (if it exists)
+    python bench.py -k convert/kanji                 # only benchmarks matching a filter
+
+The HTTP benchmarks call the app in-process through httpx's ASGI transport, so they measure the
+request path without a server or network.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+import convert
+from games import games
+
+LENGTHS = (1, 4, 8, 12, 16)
+SCRIPTS = ("kanji", "hiragana", "katakana", "romaji")
+# Inputs per benchmark, cycled through so caches and branch history don't flatter the results
+INPUTS = 1024
+
+
+def random_number(rng, length):
+    return rng.randrange(10 ** (length - 1) if length > 1 else 0, 10**length)
+
+
+def random_decimal(rng, length):
+    return f"{random_number(rng, length)}.{rng.randrange(100)}"
+
+
+def cycle(inputs, func):
+    # A benchmark that calls func on the next input each time
+    inputs = list(inputs)
+    position = 0
+
+    def call():
+        nonlocal position
+        position = (position + 1) % len(inputs)
+        return func(inputs[position])
+
+    return call
+
+
+def benchmarks(rng):
+    """
+    Returns [(name, call)] for every synchronous benchmark.
+    """
+    found = []
+    for script in SCRIPTS:
+        for length in LENGTHS:
+            numbers = [random_number(rng, length) for _ in range(INPUTS)]
+            found.append(
+                (
+                    f"convert/{script}/{length}",
+                    cycle(numbers, lambda x, script=script: convert.Convert(x, script)),
+                )
+            )
+        decimals = [random_decimal(rng, 4) for _ in range(INPUTS)]
+        found.append(
+            (
+                f"convert/{script}/decimal",
+                cycle(decimals, lambda x, script=script: convert.Convert(x, script)),
+            )
+        )
+    for length in LENGTHS:
+        kanji = [
+            convert.Convert(random_number(rng, length), "kanji") for _ in range(INPUTS)
+        ]
+        found.append((f"convert_kanji/{length}", cycle(kanji, convert.ConvertKanji)))
+    for selected_game in games:
+        found.append((f"game/{selected_game.__name__}", lambda g=selected_game: g(rng)))
+    return found
+
+
+def http_benchmarks():
+    """
+    Returns [(name, async call)] for the quiz page, through an in-process ASGI client.
+    """
+    import httpx
+
+    from main import app, tokens
+
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench"
+    )
+
+    async def get():
+        response = await client.get("/")
+        response.raise_for_status()
+        return response
+
+    async def post():
+        # The token is issued directly rather than by a GET, so only the POST is measured
+        token, _ = tokens.issue()
+        response = await client.post(
+            "/", data={"user_answer": "42", "question_token": token}
+        )
+        response.raise_for_status()
+
+    return [("http/get", get), ("http/post", post)]
+
+
+def summarize(samples):
+    """
+    Returns ops/sec and latency percentiles (in microseconds) for a list of call times in ns.
+    """
+    samples.sort()
+
+    def percentile(p):
+        return samples[min(len(samples) - 1, int(len(samples) * p))] / 1000
+
+    return {
+        "calls": len(samples),
+        "ops": len(samples) * 1e9 / sum(samples),
+        "p50_us": percentile(0.50),
+        "p95_us": percentile(0.95),
+        "p99_us": percentile(0.99),
+    }
+
+
+def run(call, seconds, warmup=0.1):
+    perf_counter_ns = time.perf_counter_ns
+    samples = []
+    append = samples.append
+    for duration in (warmup, seconds):
+        samples.clear()
+        end = perf_counter_ns() + duration * 1e9
+        while True:
+            start = perf_counter_ns()
+            call()
+            stop = perf_counter_ns()
+            append(stop - start)
+            if stop > end:
+                break
+    return summarize(samples)
+
+
+async def run_async(call, seconds, warmup=0.1):
+    perf_counter_ns = time.perf_counter_ns
+    samples = []
+    for duration in (warmup, seconds):
+        samples.clear()
+        end = perf_counter_ns() + duration * 1e9
+        while True:
+            start = perf_counter_ns()
+            await call()
+            stop = perf_counter_ns()
+            samples.append(stop - start)
+            if stop > end:
+                break
+    return summarize(samples)
+
+
+def report(name, result, baseline=None):
+    line = (
+        f"{name:<32} {result['ops']:>12,.0f} ops/s  "
+        f"p50 {result['p50_us']:>9.1f}us  p95 {result['p95_us']:>9.1f}us  "
+        f"p99 {result['p99_us']:>9.1f}us"
+    )
+    if baseline is not None:
+        line += f"  {result['ops'] / baseline['ops'] - 1:>+7.1%}"
+    print(line, flush=True)
+
+
+def compare(results, baselines, threshold):
+    """
+    Returns the names of benchmarks whose ops/sec dropped more than `threshold` (0.2 = 20%)
+    below their baseline. Benchmarks missing from either side are skipped.
+    """
+    return [
+        name
+        for name, result in results.items()
+        if name in baselines
+        and result["ops"] < baselines[name]["ops"] * (1 - threshold)
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the converter, games and page"
+    )
+    parser.add_argument(
+        "-k", "--filter", default="", help="only run names containing this"
+    )
+    parser.add_argument("--time", type=float, default=1.0, help="seconds per benchmark")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the inputs")
+    parser.add_argument("--save", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", help="JSON baseline to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="fail when ops/sec drops by more than this fraction (default 0.2)",
+    )
+    args = parser.parse_args()
+
+    baselines = {}
+    if args.compare:
+        try:
+            with open(args.compare, encoding="utf-8") as f:
+                baselines = json.load(f)["results"]
+        except FileNotFoundError:
+            print(
+                f"No baseline at {args.compare}, not comparing "
+                "(record one with make bench-baseline)",
+                file=sys.stderr,
+            )
+
+    rng = random.Random(args.seed)
+    results = {}
+    for name, call in benchmarks(rng):
+        if args.filter in name:
+            results[name] = run(call, args.time)
+            report(name, results[name], baselines.get(name))
+
+    async def run_http():
+        for name, call in http_benchmarks():
+            if args.filter in name:
+                results[name] = await run_async(call, args.time)
+                report(name, results[name], baselines.get(name))
+
+    if any(args.filter in x for x in ("http/get", "http/post")):
+        asyncio.run(run_http())
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "created": int(time.time()),
+                    "python": sys.version,
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+    regressions = compare(results, baselines, args.threshold)
+    if regressions:
+        print(f"Slower than the baseline by more than {args.threshold:.0%}:")
+        for name in regressions:
+            print(f"  {name}")
+        sys.exit(1)
@@ -1,8 +1,18 @@
 # Stolen from: https://github.com/Greatdane/Convert-Numbers-to-Japanese/blob/master/Convert-Numbers-to-Japanese.py
 
 # Japanese Number Converter
-# - Currently using length functions - possible to use Recursive Functions? Difficult with the many exceptions
-# - Works up to 9 figures (999999999)
+# - A number is parsed once into a plan: a sequence of word tokens (digits, units and sound-changed words).
+#   Each script is then just a render of the plan through its dictionary.
+# - Works up to 52 figures, the largest unit being 極 (10^48)
+# - Every 4-digit group (0-9999) is planned/rendered once into a lookup table, the first time it is needed
+
+import json
+import re
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from itertools import accumulate, chain, islice
 
 romaji_dict = {
     ".": "ten",
@@ -21,12 +31,31 @@ romaji_dict = {
     "1000": "sen",
     "10000": "man",
     "100000000": "oku",
+    "1000000000000": "chou",
+    "10000000000000000": "kei",
+    "100000000000000000000": "gai",
+    "1000000000000000000000000": "jo",
+    "10000000000000000000000000000": "jou",
+    "100000000000000000000000000000000": "kou",
+    "1000000000000000000000000000000000000": "kan",
+    "10000000000000000000000000000000000000000": "sei",
+    "100000000000000000000000000000000000000000000": "sai",
+    "1000000000000000000000000000000000000000000000000": "goku",
     "300": "sanbyaku",
     "600": "roppyaku",
     "800": "happyaku",
     "3000": "sanzen",
     "8000": "hassen",
     "01000": "issen",
+    "01000000000000": "icchou",
+    "8000000000000": "hacchou",
+    "10000000000000": "jucchou",
+    "010000000000000000": "ikkei",
+    "60000000000000000": "rokkei",
+    "80000000000000000": "hakkei",
+    "100000000000000000": "jukkei",
+    "1000000000000000000": "hyakkei",
+    "10.": "jutten",
 }
 
 kanji_dict = {
@@ -46,12 +75,31 @@ kanji_dict = {
     "1000": "千",
     "10000": "万",
     "100000000": "億",
+    "1000000000000": "兆",
+    "10000000000000000": "京",
+    "100000000000000000000": "垓",
+    "1000000000000000000000000": "𥝱",
+    "10000000000000000000000000000": "穣",
+    "100000000000000000000000000000000": "溝",
+    "1000000000000000000000000000000000000": "澗",
+    "10000000000000000000000000000000000000000": "正",
+    "100000000000000000000000000000000000000000000": "載",
+    "1000000000000000000000000000000000000000000000000": "極",
     "300": "三百",
     "600": "六百",
     "800": "八百",
     "3000": "三千",
     "8000": "八千",
     "01000": "一千",
+    "01000000000000": "一兆",
+    "8000000000000": "八兆",
+    "10000000000000": "十兆",
+    "010000000000000000": "一京",
+    "60000000000000000": "六京",
+    "80000000000000000": "八京",
+    "100000000000000000": "十京",
+    "1000000000000000000": "百京",
+    "10.": "十点",
 }
 
 hiragana_dict = {
@@ -71,327 +119,729 @@ hiragana_dict = {
     "1000": "せん",
     "10000": "まん",
     "100000000": "おく",
+    "1000000000000": "ちょう",
+    "10000000000000000": "けい",
+    "100000000000000000000": "がい",
+    "1000000000000000000000000": "じょ",
+    "10000000000000000000000000000": "じょう",
+    "100000000000000000000000000000000": "こう",
+    "1000000000000000000000000000000000000": "かん",
+    "10000000000000000000000000000000000000000": "せい",
+    "100000000000000000000000000000000000000000000": "さい",
+    "1000000000000000000000000000000000000000000000000": "ごく",
     "300": "さんびゃく",
     "600": "ろっぴゃく",
     "800": "はっぴゃく",
     "3000": "さんぜん",
     "8000": "はっせん",
     "01000": "いっせん",
+    "01000000000000": "いっちょう",
+    "8000000000000": "はっちょう",
+    "10000000000000": "じゅっちょう",
+    "010000000000000000": "いっけい",
+    "60000000000000000": "ろっけい",
+    "80000000000000000": "はっけい",
+    "100000000000000000": "じゅっけい",
+    "1000000000000000000": "ひゃっけい",
+    "10.": "じゅってん",
 }
 
-key_dict = {"kanji": kanji_dict, "hiragana": hiragana_dict, "romaji": romaji_dict}
+# Katakana is the hiragana reading with every hiragana character shifted into the katakana block
+katakana_dict = {
+    key: value.translate({x: x + 0x60 for x in range(0x3041, 0x3097)})
+    for key, value in hiragana_dict.items()
+}
 
+key_dict = {
+    "kanji": kanji_dict,
+    "hiragana": hiragana_dict,
+    "katakana": katakana_dict,
+    "romaji": romaji_dict,
+}
 
-def len_one(convert_num, requested_dict):
-    # Returns single digit conversion, 0-9
-    return requested_dict[convert_num]
+# Word tokens. A plan is a bytes object of indexes into this tuple, so digits 0-9 are their own token.
+token_keys = (
+    "0",
+    "1",
+    "2",
+    "3",
+    "4",
+    "5",
+    "6",
+    "7",
+    "8",
+    "9",
+    "10",
+    "100",
+    "1000",
+    "10000",
+    "100000000",
+    "1000000000000",  # 兆
+    "10000000000000000",  # 京
+    "100000000000000000000",  # 垓
+    "1000000000000000000000000",  # 𥝱
+    "10000000000000000000000000000",  # 穣
+    "100000000000000000000000000000000",  # 溝
+    "1000000000000000000000000000000000000",  # 澗
+    "10000000000000000000000000000000000000000",  # 正
+    "100000000000000000000000000000000000000000000",  # 載
+    "1000000000000000000000000000000000000000000000000",  # 極
+    "300",
+    "600",
+    "800",
+    "3000",
+    "8000",
+    "01000",
+    "01000000000000",  # 一兆
+    "8000000000000",  # 八兆
+    "10000000000000",  # 十兆
+    "010000000000000000",  # 一京
+    "60000000000000000",  # 六京
+    "80000000000000000",  # 八京
+    "100000000000000000",  # 十京
+    "1000000000000000000",  # 百京
+    ".",
+    "10.",
+    "",  # Left by a group of all zeros, renders as nothing
+)
+TEN, HUNDRED, THOUSAND, POINT, GAP = map(
+    token_keys.index, ("10", "100", "1000", ".", "")
+)
+
+# Units of each 4-digit group above the lowest: 万, 億, 兆, 京, 垓, 𥝱, 穣, 溝, 澗, 正, 載, 極
+large_units = tuple(token_keys.index("1" + "0" * (4 * x)) for x in range(1, 13))
+MAN, OKU, CHOU, KEI = large_units[:4]
+MAX_DIGITS = 4 * len(large_units) + 4
+
+# Sound changes, a word followed by a unit word is fused into one (sanbyaku, issen, じゅってん, ...)
+sound_changes = {
+    (3, HUNDRED): token_keys.index("300"),
+    (6, HUNDRED): token_keys.index("600"),
+    (8, HUNDRED): token_keys.index("800"),
+    (3, THOUSAND): token_keys.index("3000"),
+    (8, THOUSAND): token_keys.index("8000"),
+    (1, THOUSAND): token_keys.index("01000"),
+    (1, CHOU): token_keys.index("01000000000000"),
+    (8, CHOU): token_keys.index("8000000000000"),
+    (TEN, CHOU): token_keys.index("10000000000000"),
+    (1, KEI): token_keys.index("010000000000000000"),
+    (6, KEI): token_keys.index("60000000000000000"),
+    (8, KEI): token_keys.index("80000000000000000"),
+    (TEN, KEI): token_keys.index("100000000000000000"),
+    (HUNDRED, KEI): token_keys.index("1000000000000000000"),
+    (TEN, POINT): token_keys.index("10."),
+}
 
 
-def len_two(convert_num, requested_dict):
-    # Returns the conversion, when number is of length two (10-99)
-    if convert_num[0] == "0":  # if 0 is first, return len_one
-        return len_one(convert_num[1], requested_dict)
-    if convert_num == "10":
-        return requested_dict["10"]  # Exception, if number is 10, simple return 10
-    if convert_num[0] == "1":  # When first number is 1, use ten plus second number
-        return requested_dict["10"] + " " + len_one(convert_num[1], requested_dict)
-    elif convert_num[1] == "0":  # If ending number is zero, give first number plus 10
-        return len_one(convert_num[0], requested_dict) + " " + requested_dict["10"]
-    else:
-        num_list = []
-        for x in convert_num:
-            num_list.append(requested_dict[x])
-        num_list.insert(1, requested_dict["10"])
-        # Convert to a string (from a list)
-        output = ""
-        for y in num_list:
-            output += y + " "
-        output = output[: len(output) - 1]  # take off the space
-        return output
-
-
-def len_three(convert_num, requested_dict):
-    # Returns the conversion, when number is of length three (100-999)
-    num_list = []
-    if convert_num[0] == "1":
-        num_list.append(requested_dict["100"])
-    elif convert_num[0] == "3":
-        num_list.append(requested_dict["300"])
-    elif convert_num[0] == "6":
-        num_list.append(requested_dict["600"])
-    elif convert_num[0] == "8":
-        num_list.append(requested_dict["800"])
-    else:
-        num_list.append(requested_dict[convert_num[0]])
-        num_list.append(requested_dict["100"])
-    if convert_num[1:] == "00" and len(convert_num) == 3:
-        pass
-    else:
-        if convert_num[1] == "0":
-            num_list.append(requested_dict[convert_num[2]])
-        else:
-            num_list.append(len_two(convert_num[1:], requested_dict))
-    output = ""
-    for y in num_list:
-        output += y + " "
-    output = output[: len(output) - 1]
-    return output
-
-
-def len_four(convert_num, requested_dict, stand_alone):
-    # Returns the conversion, when number is of length four (1000-9999)
-    num_list = []
-    # First, check for zeros (and get deal with them)
-    if convert_num == "0000":
-        return ""
-    while convert_num[0] == "0":
-        convert_num = convert_num[1:]
-    if len(convert_num) == 1:
-        return len_one(convert_num, requested_dict)
-    elif len(convert_num) == 2:
-        return len_two(convert_num, requested_dict)
-    elif len(convert_num) == 3:
-        return len_three(convert_num, requested_dict)
-    # If no zeros, do the calculation
-    else:
-        # Have to handle 1000, depending on if its a standalone 1000-9999 or included in a larger number
-        if convert_num[0] == "1" and stand_alone:
-            num_list.append(requested_dict["1000"])
-        elif convert_num[0] == "1":
-            num_list.append(requested_dict["01000"])
-        elif convert_num[0] == "3":
-            num_list.append(requested_dict["3000"])
-        elif convert_num[0] == "8":
-            num_list.append(requested_dict["8000"])
-        else:
-            num_list.append(requested_dict[convert_num[0]])
-            num_list.append(requested_dict["1000"])
-        if convert_num[1:] == "000" and len(convert_num) == 4:
-            pass
-        else:
-            if convert_num[1] == "0":
-                num_list.append(len_two(convert_num[2:], requested_dict))
+def group_plan(group, stand_alone):
+    # Plans a 4-digit group (0-9999). 1 is left out before 十, 百 and a stand-alone 千,
+    # but kept (一千, issen) when the group is part of a larger number
+    if group == 0:
+        return bytes((0,)) if stand_alone else b""
+    plan = []
+    for unit, digit in (
+        (THOUSAND, group // 1000),
+        (HUNDRED, group // 100 % 10),
+        (TEN, group // 10 % 10),
+    ):
+        if digit == 1 and (unit != THOUSAND or stand_alone):
+            plan.append(unit)
+        elif (digit, unit) in sound_changes:
+            plan.append(sound_changes[digit, unit])
+        elif digit:
+            plan += digit, unit
+    if group % 10:
+        plan.append(group % 10)
+    return bytes(plan)
+
+
+# Upper limit on the size of one group table (text + offsets), in bytes
+GROUP_TABLE_BUDGET = 512 * 1024
+
+
+class GroupTable:
+    # One entry per 4-digit group, kept as one string (or bytes) plus offsets
+    # Entries 0-9999 are the embedded forms ("0000" -> nothing, "1000" -> issen), entry 10000 is a
+    # stand-alone zero and entries 10001-11000 are the stand-alone forms of 1000-1999 ("1000" -> sen)
+    __slots__ = ("text", "offsets")
+
+    def __init__(self, entries, empty=""):
+        self.text = empty.join(entries)
+        self.offsets = array("I", accumulate(map(len, entries), initial=0))
+
+    def __getitem__(self, group):
+        return self.text[self.offsets[group] : self.offsets[group + 1]]
+
+    def stand_alone(self, group):
+        if group == 0:
+            return self[10000]
+        if 1000 <= group < 2000:
+            return self[group + 9001]
+        return self[group]
+
+    def nbytes(self):
+        return sys.getsizeof(self.text) + sys.getsizeof(self.offsets)
+
+
+_tables = {}
+
+
+def plan_table():
+    # Plans of every group, shared by all dictionaries
+    table = _tables.get("plan")
+    if table is None:
+        plans = [group_plan(x, False) for x in range(10000)]
+        plans.append(group_plan(0, True))
+        plans.extend(group_plan(x, True) for x in range(1000, 2000))
+        table = _tables["plan"] = GroupTable(plans, b"")
+        assert table.nbytes() <= GROUP_TABLE_BUDGET, "plan table over memory budget"
+    return table
+
+
+def separator(requested_dict):
+    # Romaji keeps spaces between words, kanji and kana don't
+    return " " if requested_dict is romaji_dict else ""
+
+
+def dict_words(requested_dict):
+    # The dictionary's word for each token
+    words = _tables.get(("words", id(requested_dict)))
+    if words is None:
+        words = tuple(requested_dict.get(x, "") for x in token_keys)
+        _tables["words", id(requested_dict)] = words
+    return words
+
+
+def render(plan, requested_dict):
+    # Turns a plan into words of the requested dictionary
+    words = dict_words(requested_dict)
+    return separator(requested_dict).join([words[x] for x in plan])
+
+
+def group_table(requested_dict):
+    # Renderings of every group in the requested dictionary, built the first time it is asked for
+    table = _tables.get(id(requested_dict))
+    if table is None:
+        plans = plan_table()
+        table = GroupTable(
+            [render(plans[x], requested_dict) for x in range(len(plans.offsets) - 1)]
+        )
+        assert table.nbytes() <= GROUP_TABLE_BUDGET, "group table over memory budget"
+        _tables[id(requested_dict)] = table
+    return table
+
+
+def integer_plan(convert_num):
+    # Plans a whole number group by group, from the top. Groups below the top one leave a gap when they are
+    # all zeros, otherwise they are followed by their unit (which can fuse with the last word, e.g. いっちょう)
+    plans = plan_table()
+    if len(convert_num) <= 4:
+        return plans.stand_alone(int(convert_num))
+    count = (len(convert_num) + 3) // 4
+    start, end = 0, len(convert_num) - 4 * (count - 1)
+    plan = bytearray()
+    for unit in reversed(large_units[: count - 1]):
+        group = plans[int(convert_num[start:end])]
+        if group:
+            plan += group
+            if (plan[-1], unit) in sound_changes:
+                plan[-1] = sound_changes[plan[-1], unit]
             else:
-                num_list.append(len_three(convert_num[1:], requested_dict))
-        output = ""
-        for y in num_list:
-            output += y + " "
-        output = output[: len(output) - 1]
-        return output
-
-
-def len_x(convert_num, requested_dict):
-    # Returns everything else.. (up to 9 digits)
-    num_list = []
-    if len(convert_num[0:-4]) == 1:
-        num_list.append(requested_dict[convert_num[0:-4]])
-        num_list.append(requested_dict["10000"])
-    elif len(convert_num[0:-4]) == 2:
-        num_list.append(len_two(convert_num[0:2], requested_dict))
-        num_list.append(requested_dict["10000"])
-    elif len(convert_num[0:-4]) == 3:
-        num_list.append(len_three(convert_num[0:3], requested_dict))
-        num_list.append(requested_dict["10000"])
-    elif len(convert_num[0:-4]) == 4:
-        num_list.append(len_four(convert_num[0:4], requested_dict, False))
-        num_list.append(requested_dict["10000"])
-    elif len(convert_num[0:-4]) == 5:
-        num_list.append(requested_dict[convert_num[0]])
-        num_list.append(requested_dict["100000000"])
-        num_list.append(len_four(convert_num[1:5], requested_dict, False))
-        if convert_num[1:5] == "0000":
-            pass
+                plan.append(unit)
         else:
-            num_list.append(requested_dict["10000"])
-    else:
-        return "Not yet implemented, please choose a lower number."
-    num_list.append(len_four(convert_num[-4:], requested_dict, False))
-    output = ""
-    for y in num_list:
-        output += y + " "
-    output = output[: len(output) - 1]
-    return output
-
-
-def remove_spaces(convert_result):
-    # Remove spaces in Hirigana and Kanji results
-    correction = ""
-    for x in convert_result:
-        if x == " ":
-            pass
+            plan.append(GAP)
+        start, end = end, end + 4
+    plan += plans[int(convert_num[start:end])] or bytes((GAP,))
+    return bytes(plan)
+
+
+def number_plan(convert_num):
+    # Plans a number, with or without a decimal point
+    whole, point, decimal = convert_num.partition(".")
+    # Only plain digits, int() would take a sign (and "-5" would index the tables from the end)
+    if not (whole + decimal).isascii() or not (whole + decimal).isdigit():
+        raise ValueError(f"not a non-negative number: {convert_num!r}")
+    plan = integer_plan(whole or "0")
+    if point:
+        # Each decimal digit is read out on its own, e.g. 十点五 (じゅってんご)
+        if (plan[-1], POINT) in sound_changes:
+            plan = plan[:-1] + bytes((sound_changes[plan[-1], POINT],))
         else:
-            correction += x
-    return correction
-
-
-def do_convert(convert_num, requested_dict):
-    # Check lengths and convert accordingly
-    if len(convert_num) == 1:
-        return len_one(convert_num, requested_dict)
-    elif len(convert_num) == 2:
-        return len_two(convert_num, requested_dict)
-    elif len(convert_num) == 3:
-        return len_three(convert_num, requested_dict)
-    elif len(convert_num) == 4:
-        return len_four(convert_num, requested_dict, True)
-    else:
-        return len_x(convert_num, requested_dict)
-
-
-def split_Point(split_num, dict_choice):
-    # Used if a decmial point is in the string.
-    split_num = split_num.split(".")
-    split_num_a = split_num[0]
-    split_num_b = split_num[1]
-    split_num_b_end = " "
-    for x in split_num_b:
-        split_num_b_end += len_one(x, key_dict[dict_choice]) + " "
-    # To account for small exception of small tsu when ending in jyuu in hiragana/romaji
-    if split_num_a[-1] == "0" and split_num_a[-2] != "0" and dict_choice == "hiragana":
-        small_Tsu = Convert(split_num_a, dict_choice)
-        small_Tsu = small_Tsu[0:-1] + "っ"
-        return small_Tsu + key_dict[dict_choice]["."] + split_num_b_end
-    if split_num_a[-1] == "0" and split_num_a[-2] != "0" and dict_choice == "romaji":
-        small_Tsu = Convert(split_num_a, dict_choice)
-        small_Tsu = small_Tsu[0:-1] + "t"
-        return small_Tsu + key_dict[dict_choice]["."] + split_num_b_end
-
-    return (
-        Convert(split_num_a, dict_choice)
-        + " "
-        + key_dict[dict_choice]["."]
-        + split_num_b_end
-    )
+            plan += bytes((POINT,))
+        plan += bytes(map(int, decimal)) + bytes((GAP,))
+    return plan
+
+
+# Reverse index of single kanji to their value (一 -> 1, 十 -> 10, 万 -> 10000, ...), 〇 is also read as zero
+kanji_values = {v: int(k) for k, v in kanji_dict.items() if len(v) == 1 and k.isdigit()}
+kanji_values["〇"] = 0
+kanji_values["秭"] = kanji_values["𥝱"]
+
+
+def add_up(values):
+    # Adds up digit and unit values read left to right in a single pass. Returns None if one is None
+    # or they aren't in the order numbers are written: units get smaller within their group and from
+    # group to group (十十, 百千 and 億万 are rejected) and there is one digit in front of a unit
+    # digits: digits read since the last unit, written one after another (一二三) they are positional
+    # section: the current group below 万, total: everything from 万 and 億 groups already closed
+    # run: how many digits were read since the last unit, small/large: the last unit of each kind
+    total = section = digits = run = 0
+    small = large = None
+    for value in values:
+        if value is None:
+            return None
+        if value < 10:
+            digits = digits * 10 + value
+            run += 1
+        elif value < 10000:
+            if run > 1 or (small is not None and value >= small):
+                return None
+            # 十, 百 and 千 without a number in front of them count once
+            section += (digits or 1) * value
+            small = value
+            digits = run = 0
+        else:
+            if run > 1 or (large is not None and value >= large):
+                return None
+            # Only the first unit can stand without a number in front of it (万 but not 億万)
+            if total and not section + digits:
+                return None
+            total += (section + digits or 1) * value
+            large = value
+            small = None
+            section = digits = run = 0
+    # Positional digits (一二三) only make a number on their own
+    if run > 1 and (small is not None or large is not None):
+        return None
+    return total + section + digits
 
 
 def do_kanji_convert(convert_num):
-    # Converts kanji to arabic number
-
-    if convert_num == "零":
-        return 0
-
-    # First, needs to check for MAN 万 and OKU 億 kanji, as need to handle differently, splitting up the numbers at these intervals.
-    # key tells us whether we need to add or multiply the numbers, then we create a list of numbers in an order we need to add/multiply
-    key = []
-    numberList = []
-    y = ""
-    for x in convert_num:
-        if x == "万" or x == "億":
-            numberList.append(y)
-            key.append("times")
-            numberList.append(x)
-            key.append("plus")
-            y = ""
-        else:
-            y += x
-    if y != "":
-        numberList.append(y)
-
-    numberListConverted = []
-    baseNumber = ["一", "二", "三", "四", "五", "六", "七", "八", "九"]
-    linkNumber = ["十", "百", "千", "万", "億"]
-
-    # Converts the kanji number list to arabic numbers, using the 'base number' and 'link number' list above. For a link number, we would need to
-    # link with a base number
-    for noX in numberList:
-        count = len(noX)
-        result = 0
-        skip = 1
-        for x in reversed(noX):
-            addTo = 0
-            skip -= 1
-            count = count - 1
-            if skip == 1:
-                continue
-            if x in baseNumber:
-                for y, z in kanji_dict.items():
-                    if z == x:
-                        result += int(y)
-            elif x in linkNumber:
-                if noX[count - 1] in baseNumber and count > 0:
-                    for y, z in kanji_dict.items():
-                        if z == noX[count - 1]:
-                            tempNo = int(y)
-                            for y, z in kanji_dict.items():
-                                if z == x:
-                                    addTo += tempNo * int(y)
-                                    result += addTo
-                                    skip = 2
-                else:
-                    for y, z in kanji_dict.items():
-                        if z == x:
-                            result += int(y)
-        numberListConverted.append(int(result))
-
-    result = numberListConverted[0]
-    y = 0
-
-    # Iterate over the converted list, and either multiply/add as instructed in key list
-    for x in range(1, len(numberListConverted)):
-        if key[y] == "plus":
+    # Converts kanji to arabic number, returns None if a character isn't a kanji number
+    return add_up(map(kanji_values.get, convert_num))
+
+
+class ConversionCache:
+    # Bounded LRU cache of conversion results, safe to share between threads
+    # Counts hits, misses and evictions so the size can be tuned against real traffic
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key, default=None):
+        with self.lock:
             try:
-                if key[y + 1] == "times":
-                    result = (
-                        result + numberListConverted[x] * numberListConverted[x + 1]
-                    )
-                    y += 1
-                else:
-                    result += numberListConverted[x]
-            except IndexError:
-                result += numberListConverted[-1]
-                break
-        else:
-            result = result * numberListConverted[x]
-        y += 1
+                value = self.entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
 
-    return result
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Cache in front of Convert and ConvertKanji, off unless enable_cache is called
+_cache = None
+_missing = object()
+
+
+def enable_cache(maxsize=4096):
+    global _cache
+    _cache = ConversionCache(maxsize)
+    return _cache
+
+
+def disable_cache():
+    global _cache
+    _cache = None
+
+
+def cache_stats():
+    return None if _cache is None else _cache.stats()
 
 
 def Convert(convert_num, dict_choice):
     # Input formatting
     convert_num = str(convert_num)
     convert_num = convert_num.replace(",", "")
-    dict_choice = dict_choice.lower()
 
-    # If all is selected as dict_choice, return as a list
-    if dict_choice == "all":
-        result_list = []
-        for x in "kanji", "hiragana", "romaji":
-            result_list.append(Convert(convert_num, x))
-        return result_list
-
-    dictionary = key_dict[dict_choice]
-
-    # Exit if length is greater than current limit
-    if len(convert_num) > 9:
-        return "Number length too long, choose less than 10 digits"
+    # dict_choice can be a list of dictionaries (or all of them), which returns a list
+    if isinstance(dict_choice, str):
+        dict_choice = dict_choice.lower()
+        if dict_choice == "all":
+            dict_choice = ("kanji", "hiragana", "romaji")
+    else:
+        dict_choice = tuple(x.lower() for x in dict_choice)
 
     # Remove any leading zeroes
-    while convert_num[0] == "0" and len(convert_num) > 1:
-        convert_num = convert_num[1:]
+    convert_num = convert_num.lstrip("0") or "0"
 
-    # Check for decimal places
-    if "." in convert_num:
-        result = split_Point(convert_num, dict_choice)
+    if _cache is None:
+        result = do_convert(convert_num, dict_choice)
     else:
-        result = do_convert(convert_num, dictionary)
+        key = (convert_num, dict_choice)
+        result = _cache.get(key, _missing)
+        if result is _missing:
+            result = do_convert(convert_num, dict_choice)
+            _cache.put(key, result)
+    return result if isinstance(result, str) else list(result)
 
-    # Remove spaces and return result
-    if key_dict[dict_choice] == romaji_dict:
-        pass
-    else:
-        result = remove_spaces(result)
-    return result
+
+def do_convert(convert_num, dict_choice):
+    # Converts a formatted number, returns a tuple when dict_choice is a tuple
+    # Exit if length is greater than current limit (the largest unit is 極, 10^48)
+    if len(convert_num.partition(".")[0]) > MAX_DIGITS:
+        result = f"Number length too long, choose less than {MAX_DIGITS + 1} digits"
+        if isinstance(dict_choice, str):
+            return result
+        return tuple(result for x in dict_choice)
+
+    plan = number_plan(convert_num)
+    if isinstance(dict_choice, str):
+        return render(plan, key_dict[dict_choice])
+    return tuple(render(plan, key_dict[x]) for x in dict_choice)
 
 
 def ConvertKanji(convert_num):
-    if convert_num[0] in kanji_dict.values():
-        # Check to see if 点 (point) is in the input, and handle by splitting at 点, before and after is handled separately
-        if "点" in convert_num:
-            point = convert_num.find("点")
-            endNumber = ""
-            for x in convert_num[point + 1 :]:
-                endNumber += list(kanji_dict.keys())[list(kanji_dict.values()).index(x)]
-            return str(do_kanji_convert(convert_num[0:point])) + "." + endNumber
+    if _cache is None:
+        return do_convert_kanji(convert_num)
+    # Kanji are cached under dict_choice None, apart from Convert's results
+    key = (convert_num, None)
+    result = _cache.get(key, _missing)
+    if result is _missing:
+        result = do_convert_kanji(convert_num)
+        _cache.put(key, result)
+    return result
+
+
+def do_convert_kanji(convert_num):
+    # Check to see if 点 (point) is in the input, and handle by splitting at 点, before and after is handled separately
+    whole, point, decimal = convert_num.partition("点")
+    result = do_kanji_convert(whole)
+    if not whole or result is None:
+        return None
+    if point:
+        decimal = [kanji_values.get(x) for x in decimal]
+        if not decimal or None in decimal or max(decimal, default=0) > 9:
+            return None
+        return str(result) + "." + "".join(map(str, decimal))
+    return str(result)
+
+
+def ConvertKanjiMany(convert_nums):
+    # Converts a whole batch of kanji numbers, giving the same results as ConvertKanji on each
+    return [ConvertKanji(x) for x in convert_nums]
+
+
+# Other ways numbers are read or romanized, on top of the dictionaries
+reading_alternates = {
+    "れい": 0,
+    "ぜろ": 0,
+    "しち": 7,
+    "rei": 0,
+    "shichi": 7,
+    "kyu": 9,
+    "ju": 10,
+    "jyuu": 10,
+    "jyu": 10,
+}
+
+
+# 点 in a list of values, and the units a fused word can be split into
+POINT_VALUE = -1
+reading_units = [10, 100, 1000] + [10 ** (4 * x) for x in range(1, 13)]
+
+
+def reading_values(key):
+    # The values a dictionary word stands for, e.g. "300" (sanbyaku) is 3 then 100, "10." (jutten) 10 then 点
+    if key == ".":
+        return (POINT_VALUE,)
+    if key == "10.":
+        return (10, POINT_VALUE)
+    value = int(key)
+    if value < 10:
+        return (value,)
+    unit = max(x for x in reading_units if x <= value and value % x == 0)
+    if key[0] == "0":
+        # Keys with a leading 0 keep their 1 (issen, icchou)
+        return (1, unit)
+    return (unit,) if value == unit else (value // unit, unit)
+
+
+def reading_words():
+    # {word: values} for every hiragana, katakana and romaji word
+    words = {
+        word: reading_values(key)
+        for requested_dict in (hiragana_dict, katakana_dict, romaji_dict)
+        for key, word in requested_dict.items()
+    }
+    words.update((word, (value,)) for word, value in reading_alternates.items())
+    return words
+
+
+def trie_pattern(node):
+    # Regex for a trie node, branching once per character. A node that ends a word makes the
+    # rest optional (and greedy), so the longest word is always the one matched
+    branches = [re.escape(x) + trie_pattern(child) for x, child in node.items() if x]
+    if not branches:
+        return ""
+    pattern = "(?:" + "|".join(branches) + ")"
+    return pattern + "?" if None in node else pattern
+
+
+def reading_tokenizer():
+    # Character trie of every reading word, compiled into one regex the first time it is needed
+    # (so tokenizing runs in the regex engine). Nodes are dicts of character -> child node,
+    # a node under None ends a word
+    tokenizer = _tables.get("reading")
+    if tokenizer is None:
+        words = reading_words()
+        trie = {}
+        for word in words:
+            node = trie
+            for x in word:
+                node = node.setdefault(x, {})
+            node[None] = {}
+        tokenizer = _tables["reading"] = re.compile(trie_pattern(trie)), words
+    return tokenizer
+
+
+def tokenize_reading(convert_num):
+    # Splits a reading into the values of its words in one pass, always taking the longest word
+    # Spaces are skipped, returns None if part of it isn't a number word
+    pattern, words = reading_tokenizer()
+    found = pattern.findall(convert_num)
+    # findall skips what it can't match, so the words have to add up to the whole reading
+    if "".join(found) != "".join(convert_num.split()):
+        return None
+    return [value for word in found for value in words[word]]
+
+
+def ConvertReading(convert_num):
+    # Converts a hiragana, katakana or romaji reading (さんびゃく, sanbyaku, じゅってんご) to arabic number
+    values = tokenize_reading(convert_num.lower())
+    if not values:
+        return None
+    whole, decimal = values, None
+    if POINT_VALUE in values:
+        point = values.index(POINT_VALUE)
+        whole, decimal = values[:point], values[point + 1 :]
+        if not whole or not decimal or not all(0 <= x < 10 for x in decimal):
+            return None
+    result = add_up(whole)
+    if result is None:
+        return None
+    if decimal is None:
+        return str(result)
+    return str(result) + "." + "".join(map(str, decimal))
+
+
+def ConvertMany(convert_nums, dict_choice):
+    # Converts a whole batch of numbers (list, generator, array('q'), ...) in one pass.
+    # Gives the same results as calling Convert on each number, but goes straight to the group
+    # table, splitting each number up with divmod instead of slicing strings.
+    dict_choice = dict_choice.lower()
+
+    # If all is selected as dict_choice, return a list per number (like Convert)
+    if dict_choice == "all":
+        convert_nums = list(convert_nums)
+        return [
+            list(x)
+            for x in zip(
+                *(ConvertMany(convert_nums, x) for x in ("kanji", "hiragana", "romaji"))
+            )
+        ]
+
+    requested_dict = key_dict[dict_choice]
+    table = group_table(requested_dict)
+    join = separator(requested_dict).join
+    man = requested_dict["10000"]
+    oku = requested_dict["100000000"]
+    # Unpack the table once for the batch, so each group is a plain list lookup
+    groups = [table[x] for x in range(10000)]
+
+    results = []
+    append = results.append
+    for x in convert_nums:
+        # Anything that isn't a plain integer within range goes through the normal path
+        if type(x) is not int or x < 0 or x >= 1000000000000:
+            append(Convert(x, dict_choice))
+        elif x < 10000:
+            append(table.stand_alone(x))
         else:
-            return str(do_kanji_convert(convert_num))
+            upper, lower = divmod(x, 10000)
+            if upper < 10000:
+                append(join((groups[upper], man, groups[lower])))
+            else:
+                # 億 path, no sound changes until 兆
+                first, middle = divmod(upper, 10000)
+                num_list = [groups[first], oku, groups[middle]]
+                if middle:
+                    num_list.append(man)
+                num_list.append(groups[lower])
+                append(join(num_list))
+    return results
+
+
+# Command line: streams numbers or kanji numbers (one per line, from files or stdin) to JSONL
+#   python convert.py prices.txt > prices.jsonl
+#   zcat census.txt.gz | python convert.py --scripts kanji romaji --throughput
+# Input is read lazily and handed to a process pool in chunks of lines, with a bounded number
+# of chunks in flight, so memory stays constant however large the input is. Output is in input
+# order: {"input": "300", "kanji": "三百", ...} for numbers, {"input": "三百", "number": "300"}
+# for kanji, and {"input": ..., "error": ...} for anything else. Blank lines are skipped.
+number_pattern = re.compile(r"(?=[0-9,.]*[0-9])[0-9,]*(?:\.[0-9]*)?")
+
+
+def convert_line(line, scripts):
+    line = line.strip()
+    if number_pattern.fullmatch(line):
+        if len(line.replace(",", "").lstrip("0").partition(".")[0]) > MAX_DIGITS:
+            return {"input": line, "error": f"more than {MAX_DIGITS} digits"}
+        return {"input": line, **dict(zip(scripts, Convert(line, scripts)))}
+    number = ConvertKanji(line)
+    if number is None:
+        return {"input": line, "error": "not a number"}
+    return {"input": line, "number": number}
+
+
+def plain_integer(line):
+    return line.isascii() and line.isdigit() and len(line) <= MAX_DIGITS
+
+
+def convert_chunk(task):
+    # Converts a chunk of lines into one string of JSONL, so results cross processes in one piece.
+    # Plain integers are converted in one ConvertMany batch per script, the rest line by line.
+    lines, scripts = task
+    lines = [x for x in map(str.strip, lines) if x]
+    integers = [int(x) for x in lines if plain_integer(x)]
+    converted = zip(*(ConvertMany(integers, x) for x in scripts))
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    return "".join(
+        encode(
+            {"input": x, **dict(zip(scripts, next(converted)))}
+            if plain_integer(x)
+            else convert_line(x, scripts)
+        )
+        + "\n"
+        for x in lines
+    )
+
+
+def read_chunks(lines, scripts, chunk_size):
+    lines = iter(lines)
+    while chunk := list(islice(lines, chunk_size)):
+        yield chunk, scripts
+
+
+def convert_stream(chunks, workers, window):
+    # Yields converted chunks in input order. With more than one worker, at most `window` chunks
+    # are queued in the pool at once (Pool.imap would read the whole input ahead).
+    chunks = iter(chunks)
+    first = next(chunks, None)
+    if first is None:
+        return
+    second = next(chunks, None)
+    if workers <= 1 or second is None:
+        # Not worth starting a pool for a single chunk
+        yield convert_chunk(first)
+        if second is not None:
+            yield convert_chunk(second)
+            yield from map(convert_chunk, chunks)
+        return
+
+    import multiprocessing
+    from collections import deque
+
+    with multiprocessing.Pool(workers) as pool:
+        pending = deque()
+        for task in chain((first, second), chunks):
+            pending.append(pool.apply_async(convert_chunk, (task,)))
+            if len(pending) >= window:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+def main(argv=None):
+    # The CLI's imports are kept here, away from the app's import time
+    import argparse
+    import fileinput
+    import os
+    import time
+
+    parser = argparse.ArgumentParser(
+        description="Convert numbers (to Japanese) or kanji numbers (to digits), one per line, to JSONL"
+    )
+    parser.add_argument("files", nargs="*", help="input files, stdin if none or -")
+    parser.add_argument(
+        "--scripts",
+        nargs="+",
+        choices=tuple(key_dict),
+        default=["kanji", "hiragana", "romaji"],
+        help="scripts to convert numbers to",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk", type=int, default=10000, help="lines per chunk")
+    parser.add_argument(
+        "--throughput",
+        action="store_true",
+        help="report lines and bytes per second to stderr",
+    )
+    args = parser.parse_args(argv)
+
+    scripts = tuple(args.scripts)
+    lines = fileinput.input(args.files, encoding="utf-8")
+    # Chunks queued per worker, enough to keep every worker busy while results are written
+    window = max(1, args.workers) * 4
+    began = time.perf_counter()
+    count = size = 0
+    out = sys.stdout
+    try:
+        for converted in convert_stream(
+            read_chunks(lines, scripts, args.chunk), args.workers, window
+        ):
+            out.write(converted)
+            if args.throughput:
+                count += converted.count("\n")
+                size += len(converted.encode())
+    except BrokenPipeError:
+        # Output closed early (e.g. piped into head), point stdout at devnull so exit is quiet
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return
+    finally:
+        lines.close()
+    if args.throughput:
+        elapsed = time.perf_counter() - began
+        print(
+            f"{count:,} lines in {elapsed:.2f}s, {count / elapsed:,.0f} lines/s, "
+            f"{size / elapsed / 1e6:,.1f} MB/s out",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,446 @@
+import random
+from collections import namedtuple
+
+import wanakana
+
+import convert
+
+games = []
+
+
+def game(func):
+    games.append(func)
+    return func
+
+
+# Game data, built once at import. Every reading carries its romaji and how it is usually
+# written, with the number in kanji (三個, 一時十分) as the question already shows it in
+# digits. The games only pick records, which double as their acceptable answers.
+Reading = namedtuple("Reading", ["kana", "romaji", "written"])
+Counter = namedtuple("Counter", ["counter", "objects", "readings"])
+Floor = namedtuple("Floor", ["english", "reading"])
+Day = namedtuple("Day", ["ordinal", "reading"])
+
+
+def reading(kana, written):
+    return Reading(kana, wanakana.to_romaji(kana), written)
+
+
+def readings(kana, written):
+    # Readings for lists of kana and written forms. wanakana copies its whole kana mapping on
+    # every call, so the kana are romanized a few at a time joined by spaces (it recurses once
+    # per character, so not all at once)
+    romaji = []
+    for i in range(0, len(kana), 16):
+        romaji += wanakana.to_romaji(" ".join(kana[i : i + 16])).split(" ")
+    return tuple(map(Reading, kana, romaji, written))
+
+
+def kanji_number(number):
+    return convert.Convert(number, "kanji")
+
+
+def counter_readings(counter, *kana):
+    # Readings for 1-10 of a counter. とお (ten things) is written 十, just the number, so it
+    # has no written form and is only accepted in kana and romaji
+    return readings(
+        kana,
+        [
+            None if x == "とお" else f"{kanji_number(number)}{counter}"
+            for number, x in enumerate(kana, 1)
+        ],
+    )
+
+
+def answers(reading):
+    # The acceptable answers of a reading, leaving out a missing written form
+    return tuple(x for x in reading if x is not None)
+
+
+COUNTERS = (
+    Counter(
+        "つ",
+        ("apple", "orange", "egg", "cake"),
+        counter_readings(
+            "つ",
+            "ひとつ",
+            "ふたつ",
+            "みっつ",
+            "よっつ",
+            "いつつ",
+            "むっつ",
+            "ななつ",
+            "やっつ",
+            "ここのつ",
+            "とお",
+        ),
+    ),
+    Counter(
+        "個",
+        ("pen", "cup", "coin", "stone", "ball"),
+        counter_readings(
+            "個",
+            "いっこ",
+            "にこ",
+            "さんこ",
+            "よんこ",
+            "ごこ",
+            "ろっこ",
+            "ななこ",
+            "はっこ",
+            "きゅうこ",
+            "じゅっこ",
+        ),
+    ),
+    Counter(
+        "人",
+        ("person",),
+        counter_readings(
+            "人",
+            "ひとり",
+            "ふたり",
+            "さんにん",
+            "よにん",
+            "ごにん",
+            "ろくにん",
+            "ななにん",
+            "はちにん",
+            "きゅうにん",
+            "じゅうにん",
+        ),
+    ),
+    Counter(
+        "本",
+        ("pencil", "bottle", "umbrella", "banana"),
+        counter_readings(
+            "本",
+            "いっぽん",
+            "にほん",
+            "さんぼん",
+            "よんほん",
+            "ごほん",
+            "ろっぽん",
+            "ななほん",
+            "はっぽん",
+            "きゅうほん",
+            "じゅっぽん",
+        ),
+    ),
+    Counter(
+        "枚",
+        ("sheet of paper", "shirt", "ticket", "plate"),
+        counter_readings(
+            "枚",
+            "いちまい",
+            "にまい",
+            "さんまい",
+            "よんまい",
+            "ごまい",
+            "ろくまい",
+            "ななまい",
+            "はちまい",
+            "きゅうまい",
+            "じゅうまい",
+        ),
+    ),
+    Counter(
+        "匹",
+        ("cat", "dog", "fish"),
+        counter_readings(
+            "匹",
+            "いっぴき",
+            "にひき",
+            "さんびき",
+            "よんひき",
+            "ごひき",
+            "ろっぴき",
+            "ななひき",
+            "はっぴき",
+            "きゅうひき",
+            "じゅっぴき",
+        ),
+    ),
+    Counter(
+        "台",
+        ("car", "bicycle", "computer"),
+        counter_readings(
+            "台",
+            "いちだい",
+            "にだい",
+            "さんだい",
+            "よんだい",
+            "ごだい",
+            "ろくだい",
+            "ななだい",
+            "はちだい",
+            "きゅうだい",
+            "じゅうだい",
+        ),
+    ),
+)
+
+HOURS = range(1, 13)
+MINUTES = (0, 10, 15, 30, 50)
+HOUR_WORDS = (
+    "いちじ",
+    "にじ",
+    "さんじ",
+    "よじ",
+    "ごじ",
+    "ろくじ",
+    "しちじ",
+    "はちじ",
+    "くじ",
+    "じゅうじ",
+    "じゅういちじ",
+    "じゅうにじ",
+)
+MINUTE_WORDS = {
+    0: "",
+    10: "じゅっぷん",
+    15: "じゅうごふん",
+    30: "さんじゅっぷん",
+    50: "ごじゅっぷん",
+}
+# Every time the game can ask about, {(hour, minute): reading}
+TIMES = [(hour, minute) for hour in HOURS for minute in MINUTES]
+TIMES = dict(
+    zip(
+        TIMES,
+        readings(
+            [HOUR_WORDS[hour - 1] + MINUTE_WORDS[minute] for hour, minute in TIMES],
+            [
+                f"{kanji_number(hour)}時{kanji_number(minute)}分"
+                if minute
+                else f"{kanji_number(hour)}時"
+                for hour, minute in TIMES
+            ],
+        ),
+    )
+)
+
+FLOORS = (
+    Floor(
+        (
+            "basement",
+            "b1",
+            "b1 floor",
+            "basement 1",
+            "basement first",
+            "first basement",
+        ),
+        reading("ちかいっかい", "地下一階"),
+    ),
+    Floor(
+        ("1st floor", "first floor", "1st story", "first story", "ground floor"),
+        reading("いっかい", "一階"),
+    ),
+    Floor(
+        ("2nd floor", "second floor", "2nd story", "second story"),
+        reading("にかい", "二階"),
+    ),
+    Floor(
+        ("3rd floor", "third floor", "3rd story", "third story"),
+        reading("さんがい", "三階"),
+    ),
+    Floor(
+        ("4th floor", "fourth floor", "4th story", "fourth story"),
+        reading("よんかい", "四階"),
+    ),
+    Floor(
+        ("5th floor", "fifth floor", "5th story", "fifth story"),
+        reading("ごかい", "五階"),
+    ),
+    Floor(
+        ("6th floor", "sixth floor", "6th story", "sixth story"),
+        reading("ろっかい", "六階"),
+    ),
+    Floor(
+        ("7th floor", "seventh floor", "7th story", "seventh story"),
+        reading("ななかい", "七階"),
+    ),
+    Floor(
+        ("8th floor", "eighth floor", "8th story", "eighth story"),
+        reading("はっかい", "八階"),
+    ),
+    Floor(
+        ("9th floor", "ninth floor", "9th story", "ninth story"),
+        reading("きゅうかい", "九階"),
+    ),
+    Floor(
+        ("10th floor", "tenth floor", "10th story", "tenth story"),
+        reading("じゅっかい", "十階"),
+    ),
+)
+
+DAY_NAMES = (
+    ("ついたち", "1st"),
+    ("ふつか", "2nd"),
+    ("みっか", "3rd"),
+    ("よっか", "4th"),
+    ("いつか", "5th"),
+    ("むいか", "6th"),
+    ("なのか", "7th"),
+    ("ようか", "8th"),
+    ("ここのか", "9th"),
+    ("とおか", "10th"),
+    ("じゅういちにち", "11th"),
+    ("じゅうににち", "12th"),
+    ("じゅうさんにち", "13th"),
+    ("じゅうよっか", "14th"),
+    ("じゅうごにち", "15th"),
+    ("じゅうろくにち", "16th"),
+    ("じゅうしちにち", "17th"),
+    ("じゅうはちにち", "18th"),
+    ("じゅうくにち", "19th"),
+    ("はつか", "20th"),
+    ("にじゅういちにち", "21st"),
+    ("にじゅうににち", "22nd"),
+    ("にじゅうさんにち", "23rd"),
+    ("にじゅうよっか", "24th"),
+    ("にじゅうごにち", "25th"),
+    ("にじゅうろくにち", "26th"),
+    ("にじゅうしちにち", "27th"),
+    ("にじゅうはちにち", "28th"),
+    ("にじゅうくにち", "29th"),
+    ("さんじゅうにち", "30th"),
+    ("さんじゅういちにち", "31st"),
+)
+DAYS = tuple(
+    map(
+        Day,
+        [ordinal for _, ordinal in DAY_NAMES],
+        readings(
+            [kana for kana, _ in DAY_NAMES],
+            [f"{kanji_number(day)}日" for day in range(1, len(DAY_NAMES) + 1)],
+        ),
+    )
+)
+
+
+@game
+def guess_the_kanji(rng=random):
+    # Construct a random number of up to 6 digits
+    number = 0
+    for i in range(rng.randint(1, 6)):
+        # For non-leading digits, use a non-zero number half the time
+        if i == 0 or rng.choice((True, False)):
+            number = number * 10 + rng.randint(1, 9)
+        else:
+            number *= 10
+
+    kanji, hiragana = convert.Convert(number, ("kanji", "hiragana"))
+
+    return f"What is {kanji} ({hiragana}) in Arabic numerals?", (number,)
+
+
+def guess_the_kanji_batch(count, seed=None):
+    """
+    Generates `count` guess_the_kanji questions at once, with the same odds as calling it.
+
+    The numbers are drawn as arrays with NumPy (the optional numpy extra, imported here as it's
+    only needed for batches) and converted with convert.ConvertMany. The same `seed` gives the
+    same questions, and a numpy.random.Generator can be passed instead to continue its stream.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(1, 7, count)
+    # Draw all 6 digits for every number and keep the first `length` of them
+    digits = rng.integers(1, 10, (count, 6))
+    digits[:, 1:] *= rng.random((count, 5)) < 0.5
+    numbers = digits @ 10 ** np.arange(5, -1, -1) // 10 ** (6 - lengths)
+
+    numbers = numbers.tolist()
+    kanji = convert.ConvertMany(numbers, "kanji")
+    hiragana = convert.ConvertMany(numbers, "hiragana")
+    return [
+        (f"What is {k} ({h}) in Arabic numerals?", (number,))
+        for k, h, number in zip(kanji, hiragana, numbers)
+    ]
+
+
+@game
+def counters_game(rng=random):
+    """
+    Generates a Japanese counter quiz question.
+
+    This function randomly selects an object and its appropriate Japanese counter (see COUNTERS),
+    then generates a question asking for the correct counter word for a given number
+    of that object. The function currently supports the following counters:
+
+    - "つ" (tsu): Native Japanese counter for general objects (1-10), e.g., apples, oranges, eggs, cakes.
+      # Used for counting general, often round or unclassified objects.
+    - "冊" (satsu): Counter for books.
+      # Used specifically for counting bound volumes such as books and notebooks.
+    - "個" (ko): Counter for small, discrete objects, e.g., pens, cups, coins, stones, balls.
+      # Used for counting small, compact, or round objects.
+    - "人" (nin): Counter for people.
+    - "本" (hon): Counter for long, thin objects, e.g., pencils, bottles, umbrellas, bananas.
+    - "枚" (mai): Counter for flat objects, e.g., paper, shirts, tickets, plates.
+    - "匹" (hiki): Counter for small animals, e.g., cats, dogs, fish.
+    - "台" (dai): Counter for machines and vehicles, e.g., cars, bicycles, computers.
+    """
+    # Randomly select a counter type
+    counter_type = rng.choice(COUNTERS)
+    obj_en = rng.choice(counter_type.objects)
+    number = rng.choice(range(1, 11))
+
+    # Compose the question
+    question = f'What is the counter word for "{number} {obj_en}(s)"?'
+    return question, answers(counter_type.readings[number - 1])
+
+
+@game
+def time_game(rng=random):
+    """
+    Generates a Japanese time quiz question.
+
+    The question asks for the Japanese way to say a given time (hour + minute).
+    Minutes are restricted to 0, 10, 15, 30, and 50 for simplicity.
+    """
+    hour = rng.choice(HOURS)
+    minute = rng.choice(MINUTES)
+
+    question = f'How do you say "{hour}:{minute:02d}" in Japanese?'
+    return question, TIMES[hour, minute]
+
+
+# @game
+def building_level_game(rng=random):
+    """
+    Generates a Japanese building level quiz question.
+
+    Maps English building levels (e.g., "1st floor", "basement") to their Japanese equivalents.
+    Accepts common synonyms like "story", "floor", "basement", etc.
+    """
+    # Randomly decide direction: True = JP->EN, False = EN->JP
+    if rng.choice([True, False]):
+        # Japanese to English
+        level = rng.choice(FLOORS)
+        jp_level = level.reading.kana
+        en_level = rng.choice(level.english)
+
+        question = f'What is the English for "{jp_level}"?'
+        # Accept any of the English synonyms (case-insensitive)
+        return question, tuple(e.lower() for e in level.english)
+    else:
+        # English to Japanese (original version)
+        level = rng.choice(FLOORS)
+        en_level = rng.choice(level.english)
+
+        question = f'How do you say "{en_level}" in Japanese?'
+        return question, level.reading
+
+
+@game
+def days_of_month_game(rng=random):
+    """
+    Generates a Japanese days-of-the-month quiz question.
+
+    Randomly selects a day (1-31) and asks for its Japanese reading.
+    Accepts both hiragana and romaji as correct answers.
+    """
+    idx = rng.randint(0, 30)
+    question = f'How do you say "{idx + 1}th day of the month" in Japanese?'
+    return question, DAYS[idx].reading
@@ -0,0 +1,225 @@
+"""
+Local load generator for the quiz.
+
+Starts `uvicorn main:app` on this machine for each worker count, then drives it with simulated
+learners: each one loads a question (GET /) and answers it (POST /), correctly with
+probability `--correct`, otherwise with a wrong answer. The server and the load generator
+share a QUIZ_SECRET, so the load generator can decode question tokens itself and look up
+the correct answers, just as a worker would.
+
+For each worker count and concurrency it reports throughput, p50/p95/p99 latency per request
+type, and the error rate. With --saturate, concurrency keeps doubling until throughput stops
+growing, to find the saturation point:
+
+    python loadtest.py --workers 1 2 4 --concurrency 8 32
+    python loadtest.py --workers 4 --saturate
+
+Everything runs offline. The load generator takes a core of its own, so leave one free when
+measuring saturation.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import re
+import secrets
+import subprocess
+import sys
+import time
+
+import httpx
+
+TOKEN = re.compile(r'name="question_token" value="([^"]+)"')
+
+
+def start_server(workers, port, secret):
+    env = {**os.environ, "QUIZ_SECRET": secret}
+    env.pop("QUIZ_TOKENS", None)
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        env=env,
+    )
+
+
+async def wait_until_ready(url, server, timeout=30):
+    async with httpx.AsyncClient() as client:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise RuntimeError(f"server exited with {server.returncode}")
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"server not ready after {timeout}s")
+
+
+def percentile(samples, p):
+    return samples[min(len(samples) - 1, int(len(samples) * p))] if samples else 0.0
+
+
+class Run:
+    """
+    Latencies (in seconds) and error counts of one load run, per request type.
+    """
+
+    def __init__(self):
+        self.latencies = {"GET /": [], "POST /": []}
+        self.errors = {"GET /": 0, "POST /": 0}
+        self.elapsed = 0.0
+
+    def requests(self):
+        return sum(map(len, self.latencies.values())) + sum(self.errors.values())
+
+    def throughput(self):
+        return self.requests() / self.elapsed
+
+    def error_rate(self):
+        return sum(self.errors.values()) / max(1, self.requests())
+
+
+async def learner(client, tokens, rng, correct, run, stop):
+    """
+    Loads and answers questions until `stop`, recording every request in `run`.
+    """
+    while time.monotonic() < stop:
+        start = time.perf_counter()
+        try:
+            response = await client.get("/")
+            response.raise_for_status()
+        except httpx.HTTPError:
+            run.errors["GET /"] += 1
+            continue
+        run.latencies["GET /"].append(time.perf_counter() - start)
+
+        token = TOKEN.search(response.text).group(1)
+        if rng.random() < correct:
+            answer = str(tokens.lookup(token).answers[0])
+        else:
+            answer = "wrong"
+        start = time.perf_counter()
+        try:
+            response = await client.post(
+                "/", data={"user_answer": answer, "question_token": token}
+            )
+            response.raise_for_status()
+        except httpx.HTTPError:
+            run.errors["POST /"] += 1
+            continue
+        run.latencies["POST /"].append(time.perf_counter() - start)
+
+
+async def load(url, tokens, concurrency, duration, correct, seed):
+    """
+    Runs `concurrency` learners against `url` for `duration` seconds, returning the Run.
+    """
+    run = Run()
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        began = time.monotonic()
+        stop = began + duration
+        await asyncio.gather(
+            *(
+                learner(client, tokens, random.Random(seed + x), correct, run, stop)
+                for x in range(concurrency)
+            )
+        )
+        run.elapsed = time.monotonic() - began
+    return run
+
+
+def report(workers, concurrency, run):
+    print(
+        f"workers {workers:>3}  concurrency {concurrency:>4}  "
+        f"{run.throughput():>9,.0f} req/s  errors {run.error_rate():>6.2%}"
+    )
+    for name, samples in run.latencies.items():
+        samples.sort()
+        print(
+            f"    {name:<7} {len(samples):>8,}  "
+            + "  ".join(
+                f"p{int(p * 100)} {percentile(samples, p) * 1000:>8.2f}ms"
+                for p in (0.50, 0.95, 0.99)
+            )
+        )
+
+
+async def load_test(args):
+    secret = secrets.token_hex(16)
+    os.environ["QUIZ_SECRET"] = secret
+    os.environ.pop("QUIZ_TOKENS", None)
+    # Imported after setting the secret, so tokens decode like they do on the server
+    from main import tokens
+
+    url = f"http://127.0.0.1:{args.port}"
+    failed = False
+    for workers in args.workers:
+        server = start_server(workers, args.port, secret)
+        try:
+            await wait_until_ready(url, server)
+            # Warm up every worker before measuring
+            await load(url, tokens, workers * 4, 1.0, args.correct, args.seed)
+            if args.saturate:
+                concurrency, best = 1, None
+                while True:
+                    run = await load(
+                        url, tokens, concurrency, args.duration, args.correct, args.seed
+                    )
+                    report(workers, concurrency, run)
+                    failed |= run.error_rate() > args.max_errors
+                    if best is not None and run.throughput() < best[1] * 1.05:
+                        break
+                    if best is None or run.throughput() > best[1]:
+                        best = concurrency, run.throughput()
+                    concurrency *= 2
+                print(
+                    f"workers {workers:>3}  saturates at about {best[1]:,.0f} req/s "
+                    f"(concurrency {best[0]})"
+                )
+            else:
+                for concurrency in args.concurrency:
+                    run = await load(
+                        url, tokens, concurrency, args.duration, args.correct, args.seed
+                    )
+                    report(workers, concurrency, run)
+                    failed |= run.error_rate() > args.max_errors
+        finally:
+            server.terminate()
+            server.wait()
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the quiz locally")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--saturate", action="store_true")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    parser.add_argument("--correct", type=float, default=0.7, help="share of correct")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--max-errors",
+        type=float,
+        default=0.01,
+        help="exit 1 when a run's error rate is above this (default 0.01)",
+    )
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(load_test(args)) else 0)
@@ -1,272 +1,204 @@
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import os
 import random
-
-import wanakana
-from fastapi import FastAPI, Form, Request
-from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
-
+import secrets
+import sys
+import threading
+import time
+
+from fastapi import FastAPI, Form, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, Response
+
+try:
+    # orjson is optional (the orjson extra), it makes encoding question batches a lot faster
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as APIResponse
+except ImportError:
+    from fastapi.responses import JSONResponse as APIResponse
+
+import assets
 import convert
+import matcher
+import metrics
+import pack
+from attempts import AttemptLog
+from bank import QuestionBank
+from games import games
+from srs import Scheduler
+from tokens import StatelessTokens, TokenStore
+
 
-app = FastAPI()
+def warm_up():
+    """
+    Loads what the first requests would otherwise load on first use: Jinja2 and the
+    template, the converter tables and the answer matcher.
+    """
+    get_templates().get_template("index.html")
+    convert.plan_table()
+    for requested_dict in convert.key_dict.values():
+        convert.group_table(requested_dict)
+    matcher.canonical("warm up")
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # Warm up in the background, so the server starts accepting requests straight away
+    threading.Thread(target=warm_up, daemon=True).start()
+    # The scheduler starts a writer thread, so it is created in each worker (after a fork)
+    global scheduler, attempt_log
+    if os.environ.get("QUIZ_SRS"):
+        # Schedules are kept in memory, so another worker would update stale copies (see srs.py)
+        if int(os.environ.get("WEB_CONCURRENCY", "1")) > 1:
+            raise RuntimeError("QUIZ_SRS only works with a single worker")
+        scheduler = Scheduler(os.environ["QUIZ_SRS"])
+    # Attempts are logged per worker too, to QUIZ_ATTEMPTS (a directory) when it is set
+    if os.environ.get("QUIZ_ATTEMPTS"):
+        attempt_log = AttemptLog(os.environ["QUIZ_ATTEMPTS"])
+        attempt_log.start()
+    yield
+    if scheduler is not None:
+        scheduler.close()
+    if attempt_log is not None:
+        await attempt_log.close()
+
+
+app = FastAPI(lifespan=lifespan)
 template_dir = "templates"
-templates = Jinja2Templates(directory=template_dir)
-games = []
+templates = None
 
 
-def game(func):
-    games.append(func)
-    return func
+def get_templates():
+    # Jinja2 is only imported when the first page is rendered (or by warm_up)
+    global templates
+    if templates is None:
+        from fastapi.templating import Jinja2Templates
 
+        templates = Jinja2Templates(directory=template_dir)
+        # Built stylesheets by source name, empty (the CDN is used) until `make assets`
+        templates.env.globals["assets"] = assets.load_manifest()
+    return templates
 
-@game
-def guess_the_kanji():
 
-    # Construct a random number up to 100,000
-    digits = []
-    for i in range(random.randint(1, 6)):
-        # For non-leading digits, use a non-zero number half the time
-        if i == 0 or random.choice((True, False)):
-            digit = random.randint(1, 9)
-            digits.append(digit)
-        else:
-            digits.append(0)
+app.mount("/static", assets.PrecompressedStaticFiles(directory="static"), name="static")
 
-    number = int("".join(map(str, digits)))
 
-    kanji = convert.Convert(number, "kanji")
-    hiragana = convert.Convert(number, "hiragana")
+# Opt-in cache in front of the converter, sized with CONVERT_CACHE_SIZE (e.g. 4096)
+if os.environ.get("CONVERT_CACHE_SIZE"):
+    convert.enable_cache(int(os.environ["CONVERT_CACHE_SIZE"]))
 
-    return f"What is {kanji} ({hiragana}) in Arabic numerals?", (number,)
 
+# Opt-in instrumentation, exposed at /metrics (see metrics.py)
+metrics_enabled = os.environ.get("QUIZ_METRICS") == "1"
+if metrics_enabled:
+    metrics.instrument_convert()
+    app.add_middleware(metrics.RequestMetrics)
 
-@game
-def counters_game():
-    """
-    Generates a Japanese counter quiz question.
-
-    This function randomly selects an object and its appropriate Japanese counter,
-    then generates a question asking for the correct counter word for a given number
-    of that object. The function currently supports the following counters:
-
-    - "つ" (tsu): Native Japanese counter for general objects (1-10), e.g., apples, oranges, eggs, cakes.
-      # Used for counting general, often round or unclassified objects.
-    - "冊" (satsu): Counter for books.
-      # Used specifically for counting bound volumes such as books and notebooks.
-    - "個" (ko): Counter for small, discrete objects, e.g., pens, cups, coins, stones, balls.
-      # Used for counting small, compact, or round objects.
-    """
-    counter_data = [
-        {
-            "objects": ["apple", "orange", "egg", "cake"],
-            "counter": "つ",
-            "words": [
-                "ひとつ", "ふたつ", "みっつ", "よっつ", "いつつ",
-                "むっつ", "ななつ", "やっつ", "ここのつ", "とお"
-            ],
-            "range": range(1, 11)
-        },
-        {
-            "objects": ["pen", "cup", "coin", "stone", "ball"],
-            "counter": "個",
-            "words": [
-                "いっこ", "にこ", "さんこ", "よんこ", "ごこ",
-                "ろっこ", "ななこ", "はっこ", "きゅうこ", "じゅっこ"
-            ],
-            "range": range(1, 11)
-        },
-        {
-            "objects": ["person"],
-            "counter": "人",
-            "words": [
-                "ひとり", "ふたり", "さんにん", "よにん", "ごにん",
-                "ろくにん", "ななにん", "はちにん", "きゅうにん", "じゅうにん"
-            ],
-            "range": range(1, 11)
-        },
-    ]
 
-    # Randomly select a counter type
-    counter_type = random.choice(counter_data)
-    obj_en = random.choice(counter_type["objects"])
-    number = random.choice(counter_type["range"])
-    counter_word = counter_type["words"][number - 1]
+# Questions are served from the compiled bank when there is one (see bank.py, `make bank`)
+bank_path = os.environ.get("QUESTION_BANK", "question_bank.bin")
+bank = QuestionBank(bank_path) if os.path.exists(bank_path) else None
 
-    # Compose the question
-    question = (
-        f'What is the counter word for "{number} {obj_en}(s)"?'
-    )
-    return question, (counter_word, wanakana.to_romaji(counter_word))
 
-@game
-def time_game():
+def next_question(rng=random):
     """
-    Generates a Japanese time quiz question.
-
-    The question asks for the Japanese way to say a given time (hour + minute).
-    Minutes are restricted to 0, 10, 15, 30, and 50 for simplicity.
+    Returns (game name, question, acceptable answers) for a random game.
     """
-    hours = list(range(1, 13))
-    minutes = [0, 10, 15, 30, 50]
-
-    hour = random.choice(hours)
-    minute = random.choice(minutes)
-
-    # Japanese hour words
-    hour_words = [
-        "いちじ", "にじ", "さんじ", "よじ", "ごじ", "ろくじ",
-        "しちじ", "はちじ", "くじ", "じゅうじ", "じゅういちじ", "じゅうにじ"
-    ]
-    hour_word = hour_words[hour - 1]
-
-    # Japanese minute words
-    minute_words = {
-        0: "",
-        10: "じゅっぷん",
-        15: "じゅうごふん",
-        30: "さんじゅっぷん",
-        50: "ごじゅっぷん"
-    }
-    minute_word = minute_words[minute]
-
-    if minute == 0:
-        jp_time = hour_word
-    else:
-        jp_time = f"{hour_word}{minute_word}"
+    if not metrics_enabled:
+        return draw_question(rng)
+    start = time.perf_counter()
+    question = draw_question(rng)
+    metrics.game_seconds.observe(time.perf_counter() - start, question[0])
+    return question
 
-    question = f'How do you say "{hour}:{minute:02d}" in Japanese?'
-    return question, (jp_time, wanakana.to_romaji(jp_time))
 
-# @game
-def building_level_game():
-    """
-    Generates a Japanese building level quiz question.
+def draw_question(rng):
+    if bank is not None:
+        return bank.draw(rng)
+    selected_game = rng.choice(games)
+    return (selected_game.__name__, *selected_game(rng))
 
-    Maps English building levels (e.g., "1st floor", "basement") to their Japanese equivalents.
-    Accepts common synonyms like "story", "floor", "basement", etc.
-    """
-    levels = [
-        {
-            "en": ["basement", "b1", "b1 floor", "basement 1", "basement first", "first basement"],
-            "jp": "ちかいっかい",
-        },
-        {
-            "en": ["1st floor", "first floor", "1st story", "first story", "ground floor"],
-            "jp": "いっかい",
-        },
-        {
-            "en": ["2nd floor", "second floor", "2nd story", "second story"],
-            "jp": "にかい",
-        },
-        {
-            "en": ["3rd floor", "third floor", "3rd story", "third story"],
-            "jp": "さんがい",
-        },
-        {
-            "en": ["4th floor", "fourth floor", "4th story", "fourth story"],
-            "jp": "よんかい",
-        },
-        {
-            "en": ["5th floor", "fifth floor", "5th story", "fifth story"],
-            "jp": "ごかい",
-        },
-        {
-            "en": ["6th floor", "sixth floor", "6th story", "sixth story"],
-            "jp": "ろっかい",
-        },
-        {
-            "en": ["7th floor", "seventh floor", "7th story", "seventh story"],
-            "jp": "ななかい",
-        },
-        {
-            "en": ["8th floor", "eighth floor", "8th story", "eighth story"],
-            "jp": "はっかい",
-        },
-        {
-            "en": ["9th floor", "ninth floor", "9th story", "ninth story"],
-            "jp": "きゅうかい",
-        },
-        {
-            "en": ["10th floor", "tenth floor", "10th story", "tenth story"],
-            "jp": "じゅっかい",
-        },
-    ]
-    # Randomly decide direction: True = JP->EN, False = EN->JP
-    if random.choice([True, False]):
-        # Japanese to English
-        level = random.choice(levels)
-        jp_level = level["jp"]
-        en_level = random.choice(level["en"])
-
-        question = f'What is the English for "{jp_level}"?'
-        # Accept any of the English synonyms (case-insensitive)
-        return question, tuple(e.lower() for e in level["en"])
-    else:
-        # English to Japanese (original version)
-        level = random.choice(levels)
-        en_level = random.choice(level["en"])
-        jp_level = level["jp"]
-
-        question = f'How do you say "{en_level}" in Japanese?'
-        return question, (jp_level, wanakana.to_romaji(jp_level))
 
-@game
-def days_of_month_game():
+def question_version():
     """
-    Generates a Japanese days-of-the-month quiz question.
-
-    Randomly selects a day (1-31) and asks for its Japanese reading.
-    Accepts both hiragana and romaji as correct answers.
+    Returns what seeds draw questions from: the bank's id, or a digest of the game and converter
+    code. Stateless tokens are only valid for the version they were issued with.
+    """
+    if bank is not None:
+        return bank.id.encode()
+    digest = hashlib.sha256()
+    for module in ("games", "convert"):
+        with open(sys.modules[module].__file__, "rb") as f:
+            digest.update(f.read())
+    return digest.digest()
+
+
+# Pages carry a question token instead of the answers (see tokens.py). Tokens are stateless
+# unless QUIZ_TOKENS=store, workers that grade each other's questions need the same QUIZ_SECRET.
+if os.environ.get("QUIZ_TOKENS") == "store":
+    tokens = TokenStore(next_question)
+else:
+    secret = os.environ.get("QUIZ_SECRET", "").encode()
+    if not secret:
+        message = (
+            "QUIZ_SECRET is not set, so this process signs question tokens with its own "
+            "random secret: answers handled by another worker will show as expired"
+        )
+        # uvicorn takes its worker count from WEB_CONCURRENCY when --workers isn't given
+        if int(os.environ.get("WEB_CONCURRENCY", "1")) > 1:
+            raise RuntimeError(message)
+        logging.getLogger("uvicorn.error").warning(message)
+        secret = secrets.token_bytes(32)
+    tokens = StatelessTokens(next_question, secret, version=question_version())
+
+
+# Opt-in spaced repetition, with learners' schedules saved to the SQLite database at QUIZ_SRS
+# (see srs.py). Learners are told apart by a cookie.
+scheduler = None
+# Opt-in attempt log, to the directory at QUIZ_ATTEMPTS (see attempts.py)
+attempt_log = None
+LEARNER_COOKIE = "learner"
+
+
+async def current_learner(request):
     """
-    days = [
-        ("ついたち", "1st"),
-        ("ふつか", "2nd"),
-        ("みっか", "3rd"),
-        ("よっか", "4th"),
-        ("いつか", "5th"),
-        ("むいか", "6th"),
-        ("なのか", "7th"),
-        ("ようか", "8th"),
-        ("ここのか", "9th"),
-        ("とおか", "10th"),
-        ("じゅういちにち", "11th"),
-        ("じゅうににち", "12th"),
-        ("じゅうさんにち", "13th"),
-        ("じゅうよっか", "14th"),
-        ("じゅうごにち", "15th"),
-        ("じゅうろくにち", "16th"),
-        ("じゅうしちにち", "17th"),
-        ("じゅうはちにち", "18th"),
-        ("じゅうくにち", "19th"),
-        ("はつか", "20th"),
-        ("にじゅういちにち", "21st"),
-        ("にじゅうににち", "22nd"),
-        ("にじゅうさんにち", "23rd"),
-        ("にじゅうよっか", "24th"),
-        ("にじゅうごにち", "25th"),
-        ("にじゅうろくにち", "26th"),
-        ("にじゅうしちにち", "27th"),
-        ("にじゅうはちにち", "28th"),
-        ("にじゅうくにち", "29th"),
-        ("さんじゅうにち", "30th"),
-        ("さんじゅういちにち", "31st"),
-    ]
-    idx = random.randint(0, 30)
-    jp, en = days[idx]
-    question = f'How do you say "{idx+1}th day of the month" in Japanese?'
-    return question, (jp, wanakana.to_romaji(jp))
-
-def render(request, **kwargs):
-    selected_game = random.choice(games)
-    question, acceptable_answers = selected_game()
-    return templates.TemplateResponse(
+    Returns (learner id, Learner) for a request, or (None, None) without spaced repetition.
+    """
+    if scheduler is None:
+        return None, None
+    learner_id = request.cookies.get(LEARNER_COOKIE, "")
+    if not 16 <= len(learner_id) <= 64:
+        learner_id = secrets.token_urlsafe(16)
+    learner = scheduler.resident(learner_id)
+    if learner is None:
+        learner = await asyncio.to_thread(scheduler.load, learner_id)
+    return learner_id, learner
+
+
+def render(request, learner_id=None, learner=None, **kwargs):
+    # A learner gets the question that is due the soonest, if one is due, else a new one
+    seed = None if learner is None else learner.next_due(time.time())
+    token, issued = tokens.issue(seed)
+    start = time.perf_counter()
+    response = get_templates().TemplateResponse(
         "index.html",
         {
             "request": request,
-            "question": question,
-            "answer": ";".join([str(s) for s in acceptable_answers]),
+            "question": issued.question,
+            "token": token,
             **kwargs,
         },
     )
+    if metrics_enabled:
+        metrics.render_seconds.observe(time.perf_counter() - start, "index.html")
+    if learner_id is not None:
+        response.set_cookie(
+            LEARNER_COOKIE, learner_id, max_age=365 * 86400, httponly=True
+        )
+    return response
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -275,8 +207,11 @@ async def read_root(request: Request):
     Serves the main quiz page with a new question.
     This is called for the initial load and when the "New Question" button is clicked.
     """
+    learner_id, learner = await current_learner(request)
     return render(
         request,
+        learner_id,
+        learner,
         feedback_message=None,  # No feedback on initial load
         feedback_class=None,  # No feedback class on initial load
     )
@@ -286,18 +221,38 @@ async def read_root(request: Request):
 async def submit_answer(
     request: Request,
     user_answer: str = Form(...),
-    correct_answer: str = Form(...),
+    question_token: str = Form(...),
 ):
     """
     Handles the submission of the user's answer, checks it,
     and then serves a new question with feedback.
     """
 
-    correct_answer = correct_answer.split(";")
-    if user_answer.lower() in correct_answer:
+    learner_id, learner = await current_learner(request)
+    issued = tokens.lookup(question_token)
+    correct = issued is not None and matcher.matches(user_answer, issued.answers)
+    if issued is not None and learner is not None:
+        scheduler.review(
+            learner_id, learner, issued.seed, issued.game, issued.question, correct
+        )
+    if issued is not None and attempt_log is not None:
+        # Tokens record when they were issued to the second
+        attempt_log.record(
+            issued.game,
+            issued.question,
+            user_answer,
+            correct,
+            time.time() - issued.issued,
+        )
+
+    if issued is None:
+        feedback_message = "⌛ That question has expired, here is a new one."
+        feedback_class = "info"
+    elif correct:
         feedback_message = "🎉 Correct! Well done!"
         feedback_class = "success"
     else:
+        correct_answer = [str(s) for s in issued.answers]
         if len(correct_answer) > 1:
             *rest, final = correct_answer
             correct_answer = ", ".join(rest + [f"or {final}"])
@@ -308,6 +263,133 @@ async def submit_answer(
 
     return render(
         request,
+        learner_id,
+        learner,
         feedback_message=feedback_message,
         feedback_class=feedback_class,
     )
+
+
+def draw(learner=None, exclude=None):
+    """
+    Returns (seed, (game name, question, acceptable answers)), for the learner's due
+    question if there is one (other than the one drawn with `exclude`), else for a new
+    random seed.
+    """
+    seed = None if learner is None else learner.next_due(time.time())
+    if seed is None or seed == exclude:
+        seed = random.getrandbits(64)
+    return seed, next_question(random.Random(seed))
+
+
+def question_frame(drawn):
+    _, (name, question, _) = drawn
+    return {"type": "question", "game": name, "question": question}
+
+
+@app.websocket("/ws")
+async def quiz_socket(websocket: WebSocket):
+    """
+    Quiz over one connection. The server sends {"type": "question", ...}, the client
+    replies {"answer": "..."} (or {"skip": true}), and the server sends back one frame
+    with the grading and the next question:
+
+        {"type": "result", "correct": true, "answers": [...], "next": {"type": "question", ...}}
+
+    The next question is drawn while the learner is still answering the current one.
+    """
+    await websocket.accept()
+    # Spaced repetition only for learners who already have a cookie from the page
+    learner_id, learner = (
+        await current_learner(websocket)
+        if LEARNER_COOKIE in websocket.cookies
+        else (None, None)
+    )
+    current = draw(learner)
+    try:
+        await websocket.send_json(question_frame(current))
+        asked = time.time()
+        while True:
+            # The current question is still due until it is answered, so it's left out
+            upcoming = draw(learner, exclude=current[0])
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            # Text or binary frames, either way holding JSON
+            try:
+                message = json.loads(frame.get("text") or frame.get("bytes") or "")
+            except ValueError:
+                message = None
+            if not isinstance(message, dict):
+                await websocket.send_json(
+                    {"type": "error", "error": "expected an object"}
+                )
+                continue
+            if message.get("skip"):
+                current = upcoming
+                await websocket.send_json(question_frame(current))
+                asked = time.time()
+                continue
+            answer = message.get("answer")
+            if not isinstance(answer, str):
+                await websocket.send_json(
+                    {"type": "error", "error": "expected an answer"}
+                )
+                continue
+
+            seed, (name, question, answers) = current
+            correct = matcher.matches(answer, answers)
+            if learner is not None:
+                scheduler.review(learner_id, learner, seed, name, question, correct)
+            if attempt_log is not None:
+                attempt_log.record(name, question, answer, correct, time.time() - asked)
+            current = upcoming
+            await websocket.send_json(
+                {
+                    "type": "result",
+                    "correct": correct,
+                    "answers": [str(s) for s in answers],
+                    "next": question_frame(current),
+                }
+            )
+            asked = time.time()
+    except WebSocketDisconnect:
+        pass
+
+
+@app.get("/api/questions", response_class=APIResponse)
+async def questions(n: int = Query(50, ge=1, le=500)):
+    """
+    Returns a batch of `n` questions with their acceptable answers and question tokens
+    as JSON, so a client can prefetch a whole practice session in one request.
+    """
+    batch = []
+    for _ in range(n):
+        token, issued = tokens.issue()
+        batch.append(
+            {
+                "game": issued.game,
+                "question": issued.question,
+                "answers": [str(s) for s in issued.answers],
+                "token": token,
+            }
+        )
+    return APIResponse({"questions": batch})
+
+
+@app.get("/api/pack", response_class=APIResponse)
+async def practice_pack(n: int = Query(50, ge=1, le=500)):
+    """
+    Returns an offline practice pack of `n` questions, with hashed answers for grading
+    on the client (see pack.py).
+    """
+    return APIResponse(pack.build_pack(n, next_question))
+
+
+@app.get("/metrics")
+async def read_metrics():
+    """
+    Serves the metrics in the Prometheus text format (empty unless QUIZ_METRICS=1
+    or CONVERT_CACHE_SIZE is set).
+    """
+    return Response(metrics.exposition(), media_type=metrics.CONTENT_TYPE)
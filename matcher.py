@@ -0,0 +1,100 @@
+"""
+Answer matching.
+
+Accepted answers and the user's answer are both reduced to one canonical form, so grading is a
+single normalization and a set lookup. The canonical form is:
+
+- NFKC (full-width digits and letters, half-width kana), lowercase, without whitespace
+- long vowels written with macrons spelled out (ō -> ou)
+- numbers as "#<value>", but only one kind of them per question: numbers in digits when the
+  answer is a number in digits (1,000 and １０００ are both "#1000"), otherwise numbers in kanji
+  (三個 is "#3個"). The other kind is left as it is, so the number shown in the question (三百 for
+  "What is 三百 in Arabic numerals?", 3 for "3 apples") is never an answer by itself. Offline
+  packs leave numbers in kanji as they are too, see pack.py
+- kana and romaji folded to hiragana (サンコ, sanko and さんこ are all "さんこ")
+
+Spelling variants of accepted answers (jippun for juppun, ...) are added when the accepted set
+is built, never tried at grading time.
+"""
+
+import functools
+import re
+import unicodedata
+
+import wanakana
+
+import convert
+
+MACRON_SPELLINGS = {
+    "ā": "aa",
+    "ī": "ii",
+    "ū": "uu",
+    "ē": "ee",
+    "ō": "ou",
+    "â": "aa",
+    "ô": "ou",
+}
+MACRONS = str.maketrans(MACRON_SPELLINGS)
+
+# Digits (with thousands separators and a decimal part), and a run of kanji numerals (units
+# above 兆 are left out, they are also common in words, e.g. 東京)
+DIGITS = re.compile(r"[0-9][0-9,]*(?:\.[0-9]+)?")
+KANJI = re.compile(r"[{0}]+(?:点[{0}]+)?".format("〇零一二三四五六七八九十百千万億兆"))
+
+# Both spellings of each pair are accepted wherever either appears in an accepted answer
+VARIANTS = (("じゅっ", "じっ"),)
+
+
+def digits_form(match):
+    whole, point, decimal = match.group().replace(",", "").partition(".")
+    return "#" + (whole.lstrip("0") or "0") + point + decimal
+
+
+def kanji_form(match):
+    value = convert.ConvertKanji(match.group())
+    return match.group() if value is None else "#" + value
+
+
+def canonical(answer, digits=False, kanji=True):
+    """
+    Returns the canonical form of an answer, to a question answered with a number in digits
+    when `digits` is true. Numbers in kanji are only folded when `kanji` is true.
+    """
+    text = unicodedata.normalize("NFKC", str(answer)).lower()
+    # "#" only comes from folding numbers, so it can't be typed in
+    text = "".join(text.split()).translate(MACRONS).replace("#", "")
+    if digits:
+        text = DIGITS.sub(digits_form, text)
+    elif kanji:
+        text = KANJI.sub(kanji_form, text)
+    return wanakana.to_hiragana(text)
+
+
+@functools.lru_cache(maxsize=4096)
+def in_digits(acceptable_answers):
+    """
+    Returns whether a tuple of acceptable answers are numbers in digits.
+    """
+    return all(
+        DIGITS.fullmatch(unicodedata.normalize("NFKC", str(x)))
+        for x in acceptable_answers
+    )
+
+
+@functools.lru_cache(maxsize=4096)
+def accepted(acceptable_answers, kanji=True):
+    """
+    Returns the frozen set of canonical forms accepted for a tuple of acceptable answers,
+    including their spelling variants.
+    """
+    digits = in_digits(acceptable_answers)
+    forms = {canonical(s, digits, kanji) for s in acceptable_answers}
+    for a, b in VARIANTS:
+        forms |= {x.replace(a, b) for x in forms} | {x.replace(b, a) for x in forms}
+    return frozenset(forms)
+
+
+def matches(user_answer, acceptable_answers):
+    acceptable_answers = tuple(acceptable_answers)
+    digits = in_digits(acceptable_answers)
+    return canonical(user_answer, digits) in accepted(acceptable_answers)
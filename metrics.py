@@ -0,0 +1,261 @@
+"""
+Hot-path metrics, exposed in the Prometheus text format.
+
+Histograms and counters are sharded per thread: each thread records into its own dict of
+counts, registered once on its first observation, so recording never takes a lock. Shards are
+only summed when the metrics are collected. Every worker process keeps its own metrics, so
+scrape each worker (or add them up) when running more than one.
+
+Recorded when enabled in main.py (QUIZ_METRICS=1):
+
+- quiz_game_seconds{game}: time to generate (or draw from the bank) a question, per game
+- quiz_convert_seconds{script}: Convert time per dict_choice
+- quiz_parse_seconds{script}: ConvertKanji (kanji) and ConvertReading (reading) time
+- quiz_convert_failures_total{script,reason}: conversions that failed (too long, unparsed)
+- quiz_render_seconds{template}: template rendering time
+- quiz_request_seconds{method,route,status}: request totals per route
+
+With the conversion cache on (CONVERT_CACHE_SIZE), its hits, misses, evictions, size and
+maxsize are exposed too, as quiz_convert_cache_*, to size it against real traffic.
+"""
+
+import functools
+import threading
+import time
+from bisect import bisect_left
+
+import convert
+
+# Bucket upper bounds in seconds, from 1us to 10s
+BUCKETS = tuple(float(f"{x}e{e}") for e in range(-6, 1) for x in (1, 2.5, 5)) + (10.0,)
+
+metrics = []
+
+
+class Metric:
+    """
+    Base class for sharded metrics, keyed by a tuple of label values.
+    `size` is the number of values kept per key (counts and sum for a histogram).
+    """
+
+    kind = None
+    size = 1
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.shards = []
+        metrics.append(self)
+
+    def shard(self):
+        try:
+            return self.local.shard
+        except AttributeError:
+            shard = self.local.shard = {}
+            with self.lock:
+                self.shards.append(shard)
+            return shard
+
+    def values(self, key):
+        shard = self.shard()
+        values = shard.get(key)
+        if values is None:
+            values = shard[key] = [0] * self.size
+        return values
+
+    def collect(self):
+        """
+        Returns {label values: summed values} over every shard.
+        """
+        with self.lock:
+            shards = list(self.shards)
+        totals = {}
+        for shard in shards:
+            for key, values in list(shard.items()):
+                total = totals.setdefault(key, [0] * self.size)
+                for i, x in enumerate(values):
+                    total[i] += x
+        return totals
+
+    def label_text(self, key, extra=""):
+        pairs = [f'{name}="{escape(value)}"' for name, value in zip(self.labels, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def exposition(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, values in sorted(self.collect().items()):
+            lines += self.samples(key, values)
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *key):
+        self.values(key)[0] += 1
+
+    def samples(self, key, values):
+        return [f"{self.name}{self.label_text(key)} {values[0]}"]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+    # A count per bucket, then the +Inf bucket, then the sum
+    size = len(BUCKETS) + 2
+
+    def observe(self, seconds, *key):
+        values = self.values(key)
+        values[bisect_left(BUCKETS, seconds)] += 1
+        values[-1] += seconds
+
+    def samples(self, key, values):
+        lines = []
+        count = 0
+        for bound, x in zip(BUCKETS + ("+Inf",), values):
+            count += x
+            le = 'le="{}"'.format(bound if bound == "+Inf" else repr(bound))
+            lines.append(f"{self.name}_bucket{self.label_text(key, le)} {count}")
+        lines.append(f"{self.name}_sum{self.label_text(key)} {values[-1]}")
+        lines.append(f"{self.name}_count{self.label_text(key)} {count}")
+        return lines
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def cache_exposition():
+    """
+    Returns the conversion cache's counters (see convert.enable_cache) as exposition lines,
+    none if the cache is off. They are the cache's own totals, shared by every thread.
+    """
+    stats = convert.cache_stats()
+    if stats is None:
+        return []
+    lines = []
+    for name, kind, help in (
+        ("hits", "counter", "Conversion cache hits"),
+        ("misses", "counter", "Conversion cache misses"),
+        ("evictions", "counter", "Conversion cache evictions"),
+        ("size", "gauge", "Conversions in the cache"),
+        ("maxsize", "gauge", "Conversion cache capacity"),
+    ):
+        metric = f"quiz_convert_cache_{name}" + ("_total" if kind == "counter" else "")
+        lines += [
+            f"# HELP {metric} {help}",
+            f"# TYPE {metric} {kind}",
+            f"{metric} {stats[name]}",
+        ]
+    return lines
+
+
+def exposition():
+    """
+    Returns every metric in the Prometheus text format.
+    """
+    lines = [line for x in metrics for line in x.exposition()]
+    return "\n".join(lines + cache_exposition()) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+game_seconds = Histogram(
+    "quiz_game_seconds", "Time to generate a question, per game", ("game",)
+)
+convert_seconds = Histogram(
+    "quiz_convert_seconds", "Convert time per dict_choice", ("script",)
+)
+parse_seconds = Histogram(
+    "quiz_parse_seconds", "Time to parse a number back to digits", ("script",)
+)
+convert_failures = Counter(
+    "quiz_convert_failures_total",
+    "Conversions that failed",
+    ("script", "reason"),
+)
+render_seconds = Histogram(
+    "quiz_render_seconds", "Template rendering time", ("template",)
+)
+request_seconds = Histogram(
+    "quiz_request_seconds",
+    "Request time per route",
+    ("method", "route", "status"),
+)
+
+
+def timed_convert(func):
+    @functools.wraps(func)
+    def wrapper(convert_num, dict_choice):
+        start = time.perf_counter()
+        result = func(convert_num, dict_choice)
+        script = dict_choice if isinstance(dict_choice, str) else "+".join(dict_choice)
+        convert_seconds.observe(time.perf_counter() - start, script)
+        first = result if isinstance(result, str) else result[0]
+        if first.startswith("Number length too long"):
+            convert_failures.inc(script, "too_long")
+        return result
+
+    return wrapper
+
+
+def timed_parse(func, script):
+    @functools.wraps(func)
+    def wrapper(convert_num):
+        start = time.perf_counter()
+        result = func(convert_num)
+        parse_seconds.observe(time.perf_counter() - start, script)
+        if result is None:
+            convert_failures.inc(script, "unparsed")
+        return result
+
+    return wrapper
+
+
+def instrument_convert():
+    """
+    Times every Convert, ConvertKanji and ConvertReading call, by replacing them in the convert
+    module (callers look them up there, so games and the matcher are covered too).
+    """
+    if hasattr(convert.Convert, "__wrapped__"):
+        return
+    convert.Convert = timed_convert(convert.Convert)
+    convert.ConvertKanji = timed_parse(convert.ConvertKanji, "kanji")
+    convert.ConvertReading = timed_parse(convert.ConvertReading, "reading")
+
+
+class RequestMetrics:
+    """
+    ASGI middleware recording the time of every HTTP request by method, route and status.
+    Requests that matched no route are recorded under route "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            route = scope.get("route")
+            request_seconds.observe(
+                time.perf_counter() - start,
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                status,
+            )
@@ -0,0 +1,100 @@
+"""
+Offline practice packs.
+
+A pack is a self-contained JSON document of questions whose acceptable answers are only stored
+as salted SHA-256 hashes, so a client can grade answers locally without revealing them:
+
+    sha256(salt + normalize(answer, question["digits"])).hexdigest() in question["answers"]
+
+where "digits" says whether the question is answered with a number in digits. normalize() is
+the server's canonical form (see matcher.py) without folding numbers in kanji, which takes the
+whole numeral parser, so a client can implement it from the pack's "normalize" section:
+
+1. NFKC, then lowercase, then remove whitespace and "#"
+2. replace each character in "macrons" with its spelling (ō -> ou)
+3. only when "digits" is true, replace each match of the "number" regex with "#" followed by
+   the match without commas and with leading zeros stripped from its whole part (leaving "0"),
+   e.g. "1,000" -> "#1000", "007.50" -> "#7.50"
+4. fold kana and romaji to hiragana with wanakana's toHiragana (wanakana-python is its port)
+
+An answer with a number in kanji (三個) is then graded as it's written, and still matches when
+it's written the usual way. Every spelling variant the server accepts is hashed too.
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import secrets
+import sys
+import time
+
+import matcher
+
+VERSION = 4
+
+
+def form_hash(salt, form):
+    return hashlib.sha256((salt + form).encode()).hexdigest()
+
+
+def build_pack(n, next_question, rng=random):
+    """
+    Draws `n` questions with `next_question(rng)` and returns the pack as a dict.
+    Every question gets its own salt, so equal answers hash differently across questions.
+    """
+    questions = []
+    for _ in range(n):
+        name, question, acceptable_answers = next_question(rng)
+        salt = secrets.token_hex(8)
+        acceptable_answers = tuple(map(str, acceptable_answers))
+        questions.append(
+            {
+                "game": name,
+                "question": question,
+                "salt": salt,
+                "digits": matcher.in_digits(acceptable_answers),
+                "answers": sorted(
+                    form_hash(salt, x)
+                    for x in matcher.accepted(acceptable_answers, kanji=False)
+                ),
+            }
+        )
+    return {
+        "version": VERSION,
+        "created": int(time.time()),
+        "hash": "sha256(salt + normalize(answer, digits))",
+        "normalize": {
+            "unicode": "NFKC",
+            "lowercase": True,
+            "remove": "whitespace and #",
+            "macrons": matcher.MACRON_SPELLINGS,
+            "number": matcher.DIGITS.pattern,
+            "kana": "wanakana.toHiragana",
+        },
+        "questions": questions,
+    }
+
+
+def check_answer(question, answer):
+    """
+    Grades `answer` against one question of a pack, the same way a client would.
+    """
+    form = matcher.canonical(answer, question["digits"], kanji=False)
+    return form_hash(question["salt"], form) in question["answers"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export an offline practice pack")
+    parser.add_argument("-n", type=int, default=50, help="number of questions")
+    parser.add_argument("-o", "--output", help="file to write (default: stdout)")
+    args = parser.parse_args()
+
+    from main import next_question
+
+    pack = build_pack(args.n, next_question)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(pack, f, ensure_ascii=False)
+    else:
+        json.dump(pack, sys.stdout, ensure_ascii=False)
@@ -0,0 +1,124 @@
+"""
+Preload-and-fork server.
+
+Builds everything once in the parent process (the app, the game data, the converter tables,
+the question bank mapping) and then forks the workers, which share all of it copy-on-write
+instead of each importing and building its own copy:
+
+    python serve.py --workers 4 --port 8000
+
+Before forking, the preloaded objects are moved out of the garbage collector's reach with
+gc.freeze(), so collections in the workers don't write to (and copy) the shared pages. The
+large data is already held in few big objects (the converter's group tables are one string
+plus an array of offsets per script, the question bank is an mmap), so reference counting
+touches few shared pages either.
+
+Workers share the parent's token secret, so any worker can grade any other worker's question
+without setting QUIZ_SECRET. QUIZ_TOKENS=store keeps tokens per worker, so it's refused with
+more than one. Workers that die are replaced.
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import random
+import secrets
+import signal
+import socket
+import sys
+import time
+import traceback
+
+import uvicorn
+
+
+def preload():
+    """
+    Imports the app and builds everything workers would otherwise build on first use.
+    """
+    import main
+
+    main.warm_up()
+    return main.app
+
+
+def serve(app, sock, args):
+    # Workers would otherwise draw the same questions, from the random state they forked with
+    random.seed()
+    config = uvicorn.Config(app, log_level=args.log_level, access_log=False)
+    server = uvicorn.Server(config)
+    asyncio.run(server.serve(sockets=[sock]))
+
+
+def spawn(app, sock, args):
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        try:
+            serve(app, sock, args)
+        except BaseException:
+            traceback.print_exc()
+            os._exit(1)
+        os._exit(0)
+    return pid
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve the quiz with preforked workers"
+    )
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+    if os.environ.get("QUIZ_SRS") and args.workers > 1:
+        parser.error("QUIZ_SRS only works with a single worker (see srs.py)")
+    if os.environ.get("QUIZ_TOKENS") == "store" and args.workers > 1:
+        parser.error(
+            "QUIZ_TOKENS=store only works with a single worker (see tokens.py)"
+        )
+
+    # Workers inherit the parent's secret either way, this keeps main.py from warning about it
+    os.environ.setdefault("QUIZ_SECRET", secrets.token_hex(32))
+    began = time.perf_counter()
+    app = preload()
+    gc.collect()
+    gc.freeze()
+    print(f"Preloaded in {time.perf_counter() - began:.2f}s", file=sys.stderr)
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    workers = {spawn(app, sock, args) for _ in range(args.workers)}
+    print(
+        f"Serving on http://{args.host}:{args.port} with {args.workers} workers",
+        file=sys.stderr,
+    )
+
+    stopping = False
+
+    def stop(signum, frame):
+        global stopping
+        stopping = True
+        for pid in workers:
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        workers.discard(pid)
+        if not stopping:
+            print(f"Worker {pid} exited ({status}), replacing it", file=sys.stderr)
+            time.sleep(0.5)
+            workers.add(spawn(app, sock, args))
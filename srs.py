@@ -0,0 +1,292 @@
+"""
+Spaced repetition.
+
+Every question a learner answers becomes an item, identified by the seed it was drawn with
+(see tokens.py), so it can be drawn again exactly. Items are scheduled SM-2 style: each has an
+ease factor and an interval. A correct answer multiplies the interval by the ease, and a wrong
+one brings the item back after RELEARN_INTERVAL and lowers its ease.
+
+Each learner keeps a heap of (due, seed), so the next due item is found in O(log n). Updated
+entries are pushed again, and stale heap entries are dropped when they reach the top (or all at
+once when they outnumber the items). A learner keeps at most MAX_ITEMS items: past that, a new
+item replaces the best learned one (the longest interval).
+
+At most `maxsize` learners and `max_resident_items` items across them are kept in memory, and
+the least recently active learners are evicted. An item costs about 300 bytes (its state list,
+its dict entry and its heap entries), so the default budget of MAX_RESIDENT_ITEMS items is about
+150 MB however many learners there are. Every update is queued and written to SQLite (in WAL
+mode) in batches by a background thread, so answering never waits on disk. A batch that fails
+to write is logged and retried with the next one. Evicted learners are loaded back from the
+database.
+
+Learners in memory are never reloaded, so a schedule must only be updated by one process:
+spaced repetition runs with a single worker (main.py and serve.py refuse more than one).
+"""
+
+import heapq
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+FIRST_INTERVAL = 86400
+SECOND_INTERVAL = 6 * 86400
+RELEARN_INTERVAL = 60
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+MAX_ITEMS = 5000
+MAX_RESIDENT_ITEMS = 500000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    learner TEXT NOT NULL,
+    seed INTEGER NOT NULL,
+    game TEXT NOT NULL,
+    question TEXT NOT NULL,
+    due REAL NOT NULL,
+    ease REAL NOT NULL,
+    interval REAL NOT NULL,
+    reps INTEGER NOT NULL,
+    PRIMARY KEY (learner, seed)
+) WITHOUT ROWID
+"""
+
+
+def to_signed(seed):
+    # Seeds are unsigned 64-bit, SQLite integers are signed
+    return seed - (1 << 64) if seed >= 1 << 63 else seed
+
+
+def to_unsigned(seed):
+    return seed + (1 << 64) if seed < 0 else seed
+
+
+class Learner:
+    """
+    One learner's items, {seed: [due, ease, interval, reps]}, and their due heap.
+    """
+
+    def __init__(self, max_items=MAX_ITEMS):
+        self.max_items = max_items
+        self.items = {}
+        self.heap = []
+
+    def set(self, seed, state):
+        self.items[seed] = state
+        heapq.heappush(self.heap, (state[0], seed))
+        if len(self.heap) > 2 * len(self.items) + 64:
+            self.heap = [(state[0], seed) for seed, state in self.items.items()]
+            heapq.heapify(self.heap)
+
+    def remove(self, seed):
+        # Its heap entry goes stale, like an updated one
+        self.items.pop(seed, None)
+
+    def make_room(self, seed):
+        """
+        Before adding the item `seed`, removes the best learned item if the learner is at
+        max_items, returning its seed (else None).
+        """
+        if seed in self.items or len(self.items) < self.max_items:
+            return None
+        # O(items), only once per new item at the cap
+        evicted = max(self.items, key=lambda x: self.items[x][2])
+        self.remove(evicted)
+        return evicted
+
+    def next_due(self, now):
+        """
+        Returns the seed of the item due the earliest if it's due by `now`, else None.
+        """
+        heap = self.heap
+        while heap:
+            due, seed = heap[0]
+            state = self.items.get(seed)
+            if state is not None and state[0] == due:
+                return seed if due <= now else None
+            heapq.heappop(heap)
+        return None
+
+    def review(self, seed, correct, now):
+        """
+        Reschedules an item after an answer, returning its new state.
+        """
+        due, ease, interval, reps = self.items.get(seed, (now, INITIAL_EASE, 0, 0))
+        # SM-2 ease update, grading a correct answer 4 and a wrong one 1
+        quality = 4 if correct else 1
+        ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        if not correct:
+            reps = 0
+            interval = RELEARN_INTERVAL
+        else:
+            reps += 1
+            if reps == 1:
+                interval = FIRST_INTERVAL
+            elif reps == 2:
+                interval = SECOND_INTERVAL
+            else:
+                interval *= ease
+        state = [now + interval, ease, interval, reps]
+        self.set(seed, state)
+        return state
+
+
+class Scheduler:
+    """
+    Per-learner schedules kept in memory (at most `maxsize` learners holding at most
+    `max_resident_items` items) and in SQLite at `path`. Updates are written by a background
+    thread every `flush_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        path,
+        maxsize=50000,
+        flush_interval=1.0,
+        max_resident_items=MAX_RESIDENT_ITEMS,
+    ):
+        self.path = path
+        self.maxsize = maxsize
+        self.flush_interval = flush_interval
+        self.max_resident_items = max_resident_items
+        self.lock = threading.Lock()
+        self.learners = OrderedDict()
+        # Items held by the learners in memory
+        self.resident_items = 0
+        self.pending = []
+        # Updates taken from pending by the writer, until they are committed
+        self.writing = []
+        self.local = threading.local()
+        with self.connect() as connection:
+            connection.execute(SCHEMA)
+        self.closed = threading.Event()
+        self.writer = threading.Thread(target=self.write_loop, daemon=True)
+        self.writer.start()
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def connection(self):
+        # One connection per thread, sqlite3 connections can't be shared between threads
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = self.local.connection = self.connect()
+        return connection
+
+    def resident(self, learner_id):
+        """
+        Returns a learner if it's in memory (marking it as recently active), else None.
+        """
+        with self.lock:
+            learner = self.learners.get(learner_id)
+            if learner is not None:
+                self.learners.move_to_end(learner_id)
+            return learner
+
+    def load(self, learner_id):
+        """
+        Returns a learner, loading it from the database if it isn't in memory. This reads
+        from disk, so call it off the event loop.
+        """
+        learner = self.resident(learner_id)
+        if learner is not None:
+            return learner
+        learner = Learner()
+        rows = self.connection().execute(
+            "SELECT seed, due, ease, interval, reps FROM items WHERE learner = ?",
+            (learner_id,),
+        )
+        for seed, *state in rows:
+            learner.set(to_unsigned(seed), state)
+        with self.lock:
+            # Updates that are still queued are newer than the database
+            for row in self.writing + self.pending:
+                if row[0] == learner_id:
+                    if row[2] is None:
+                        learner.remove(to_unsigned(row[1]))
+                    else:
+                        learner.set(to_unsigned(row[1]), list(row[4:]))
+            # Another request may have loaded it meanwhile
+            if learner_id in self.learners:
+                learner = self.learners[learner_id]
+            else:
+                self.learners[learner_id] = learner
+                self.resident_items += len(learner.items)
+            self.learners.move_to_end(learner_id)
+            self.evict()
+        return learner
+
+    def evict(self):
+        # Drops the least recently active learners (but not the most recent) until within
+        # both limits. Call with the lock held
+        while len(self.learners) > 1 and (
+            len(self.learners) > self.maxsize
+            or self.resident_items > self.max_resident_items
+        ):
+            _, learner = self.learners.popitem(last=False)
+            self.resident_items -= len(learner.items)
+
+    def review(self, learner_id, learner, seed, game, question, correct, now=None):
+        """
+        Records an answer to the item drawn with `seed`, and queues the update.
+        """
+        now = time.time() if now is None else now
+        items = len(learner.items)
+        evicted = learner.make_room(seed)
+        state = learner.review(seed, correct, now)
+        with self.lock:
+            # A learner evicted meanwhile is no longer counted
+            if self.learners.get(learner_id) is learner:
+                self.resident_items += len(learner.items) - items
+                self.evict()
+            if evicted is not None:
+                # A row without a game deletes the item
+                self.pending.append((learner_id, to_signed(evicted), None))
+            self.pending.append((learner_id, to_signed(seed), game, question, *state))
+
+    def flush(self):
+        """
+        Writes every queued update in one transaction.
+        """
+        with self.lock:
+            self.writing, self.pending = self.pending, []
+        if self.writing:
+            # Only the last update of each item counts
+            latest = {row[:2]: row for row in self.writing}.values()
+            with self.connection() as connection:
+                connection.executemany(
+                    "DELETE FROM items WHERE learner = ? AND seed = ?",
+                    [row[:2] for row in latest if row[2] is None],
+                )
+                connection.executemany(
+                    "INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [row for row in latest if row[2] is not None],
+                )
+            with self.lock:
+                self.writing = []
+
+    def write_loop(self):
+        while not self.closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                with self.lock:
+                    # Retried with the next batch, ahead of the updates queued since
+                    failed = len(self.writing)
+                    self.pending[:0] = self.writing
+                    self.writing = []
+                logging.getLogger(__name__).exception(
+                    "failed to write %d updates to %s, retrying", failed, self.path
+                )
+
+    def close(self):
+        """
+        Stops the writer and writes what's left.
+        """
+        self.closed.set()
+        self.writer.join()
+        self.flush()
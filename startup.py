@@ -0,0 +1,130 @@
+"""
+Startup time report and budget.
+
+Measures, each in a fresh process:
+
+- import time of main.py, from `python -X importtime`, with the slowest imports
+- time to first response: from spawning `uvicorn main:app` to the first 200 from GET /
+
+and exits with 1 when either is over its budget, so it can run in CI:
+
+    python startup.py
+    python startup.py --import-budget 500 --first-response-budget 1500
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+# Budgets in milliseconds, checked here and by tests/test_startup.py
+IMPORT_BUDGET = 600
+FIRST_RESPONSE_BUDGET = 2000
+# The app is imported and served from here, wherever this is run from
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def import_times(module="main"):
+    """
+    Imports `module` in a fresh interpreter, returning [(cumulative us, self us, name)]
+    for every import, nested imports indented like in the -X importtime output.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=ROOT,
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:") :].split("|")
+        times.append((int(cumulative), int(own), name.rstrip()))
+    return times
+
+
+def import_total(times, module="main"):
+    # Cumulative us importing `module`, from import_times()
+    return next(cumulative for cumulative, _, name in times if name.strip() == module)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def first_response(timeout=30):
+    """
+    Spawns uvicorn and returns the seconds until GET / first answers with a 200.
+    """
+    port = free_port()
+    began = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        env=os.environ.copy(),
+        cwd=ROOT,
+    )
+    try:
+        while time.perf_counter() - began < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"server exited with {server.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/") as response:
+                    if response.status == 200:
+                        return time.perf_counter() - began
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError(f"no response after {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report and check startup time")
+    parser.add_argument(
+        "--import-budget",
+        type=float,
+        default=IMPORT_BUDGET,
+        help="ms to import main.py",
+    )
+    parser.add_argument(
+        "--first-response-budget",
+        type=float,
+        default=FIRST_RESPONSE_BUDGET,
+        help="ms from spawning the server to the first response",
+    )
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to show")
+    args = parser.parse_args()
+
+    times = import_times()
+    total = import_total(times)
+    print("Slowest imports (cumulative, self) importing main.py:")
+    for cumulative, own, name in sorted(times, reverse=True)[: args.top]:
+        print(f"  {cumulative / 1000:>8.1f}ms {own / 1000:>8.1f}ms  {name}")
+
+    ttfr = first_response()
+    over = False
+    for label, value, budget in (
+        ("import main", total / 1000, args.import_budget),
+        ("first response", ttfr * 1000, args.first_response_budget),
+    ):
+        status = "ok" if value <= budget else "OVER BUDGET"
+        over |= value > budget
+        print(f"{label:>15}: {value:>8.1f}ms (budget {budget:,.0f}ms) {status}")
+    sys.exit(1 if over else 0)
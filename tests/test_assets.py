@@ -0,0 +1,49 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import assets
+
+
+@pytest.fixture
+def client(tmp_path):
+    (tmp_path / "app.css").write_text("body {}")
+    (tmp_path / "app.css.gz").write_bytes(gzip.compress(b"body {}"))
+    (tmp_path / "app.css.br").write_bytes(b"brotli")
+    app = FastAPI()
+    app.mount("/static", assets.PrecompressedStaticFiles(directory=tmp_path))
+    return TestClient(app)
+
+
+def test_accepted_encodings():
+    assert assets.accepted_encodings("gzip, br;q=0.5, deflate;q=0, x;q=?") == {
+        "gzip": 1.0,
+        "br": 0.5,
+        "deflate": 0.0,
+        "x": 0.0,
+    }
+    assert assets.accepted_encodings("") == {}
+
+
+@pytest.mark.parametrize(
+    "header, coding",
+    [
+        ("gzip, br", "br"),
+        ("gzip", "gzip"),
+        ("br;q=0, gzip", "gzip"),
+        ("br;q=0.5, gzip", "gzip"),
+        ("*", "br"),
+        ("*, br;q=0", "gzip"),
+        ("gzip;q=0, br;q=0", None),
+        ("identity", None),
+    ],
+)
+def test_precompressed_variant(client, header, coding):
+    # Streamed so the client doesn't decode the (fake) compressed body
+    with client.stream(
+        "GET", "/static/app.css", headers={"accept-encoding": header}
+    ) as response:
+        assert response.headers.get("content-encoding") == coding
+        assert response.headers["vary"] == "Accept-Encoding"
@@ -0,0 +1,75 @@
+import hashlib
+
+import pytest
+
+import convert
+
+# sha256 of "\n".join(Convert(n, script) for n in range(100000)), from the converter before the
+# group tables (baseline commit), so the tables must render every number exactly as it did
+BASELINE = {
+    "kanji": "d4d6c66df6bdeef35108a0733b0728661cca207c10eacca98c370d7ec5aa22ac",
+    "hiragana": "457447c0ca9ccc4b176886f75aa16de1983e45162cd759171425b58e90e871ab",
+    "romaji": "a9cb1e95df34bdf71664fe937d12f81b83cd19f98642a6d54c88c7f026f889a3",
+}
+
+
+def digest(results):
+    return hashlib.sha256("\n".join(results).encode()).hexdigest()
+
+
+@pytest.mark.parametrize("script", BASELINE)
+def test_convert_matches_baseline(script):
+    assert digest(convert.Convert(n, script) for n in range(100000)) == BASELINE[script]
+
+
+@pytest.mark.parametrize("script", BASELINE)
+def test_convert_many_matches_baseline(script):
+    # ConvertMany reads the group table directly for every one of these
+    assert digest(convert.ConvertMany(range(100000), script)) == BASELINE[script]
+
+
+@pytest.mark.parametrize("script", BASELINE)
+def test_group_table_matches_convert(script):
+    table = convert.group_table(convert.key_dict[script])
+    assert [table.stand_alone(n) for n in range(10000)] == [
+        convert.Convert(n, script) for n in range(10000)
+    ]
+
+
+@pytest.mark.parametrize("number", [-5, "-5", "+5", "1e3", " 5", "五"])
+def test_convert_rejects_non_digits(number):
+    with pytest.raises(ValueError):
+        convert.Convert(number, "kanji")
+    with pytest.raises(ValueError):
+        convert.ConvertMany([number], "kanji")
+
+
+@pytest.mark.parametrize(
+    "kanji, number",
+    [("三百", "300"), ("千百", "1100"), ("一二三", "123"), ("一億二千万", "120000000")],
+)
+def test_convert_kanji(kanji, number):
+    assert convert.ConvertKanji(kanji) == number
+
+
+@pytest.mark.parametrize(
+    "kanji", ["十十", "百千", "億万", "一億万", "二三百", "百二三", "八千点", "点五"]
+)
+def test_convert_kanji_rejects_malformed(kanji):
+    assert convert.ConvertKanji(kanji) is None
+
+
+@pytest.mark.parametrize(
+    "reading, number",
+    [("さんびゃく", "300"), ("juu ten go", "10.5"), ("ハッセン", "8000")],
+)
+def test_convert_reading(reading, number):
+    assert convert.ConvertReading(reading) == number
+
+
+@pytest.mark.parametrize(
+    "reading",
+    ["juu juu", "いちまんまん", "ろっぴゃくろっぴゃく", "はっせんてん", "てんご"],
+)
+def test_convert_reading_rejects_malformed(reading):
+    assert convert.ConvertReading(reading) is None
@@ -0,0 +1,38 @@
+import random
+import re
+
+import pytest
+
+import games
+import matcher
+
+
+@pytest.mark.parametrize("answer", ["300", "３００", "0300", " 300 "])
+def test_digits_accepted(answer):
+    assert matcher.matches(answer, (300,))
+
+
+def test_kanji_from_question_not_accepted_for_digits():
+    assert not matcher.matches("三百", (300,))
+
+
+def test_counter_readings_and_written_form_accepted():
+    three = games.COUNTERS[1].readings[2]
+    for answer in ("さんこ", "サンコ", "sanko", "三個"):
+        assert matcher.matches(answer, three)
+
+
+@pytest.mark.parametrize("game", games.games, ids=lambda x: x.__name__)
+def test_numbers_from_question_not_accepted(game):
+    rng = random.Random(0)
+    for _ in range(500):
+        question, answers = game(rng)
+        for shown in re.findall(r"\d+", question):
+            assert not matcher.matches(shown, answers)
+            assert not matcher.matches(shown + "個", answers)
+
+
+def test_answers_not_repeated():
+    ten = games.answers(games.COUNTERS[0].readings[9])
+    assert ten == ("とお", "too")
+    assert matcher.matches("十", ten) is False
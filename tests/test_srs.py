@@ -0,0 +1,42 @@
+import sqlite3
+import threading
+
+import srs
+
+
+def test_failed_batch_retried(tmp_path, monkeypatch):
+    scheduler = srs.Scheduler(str(tmp_path / "srs.db"), flush_interval=0.01)
+    learner = scheduler.load("a")
+    connection = scheduler.connection
+    attempts = []
+    retried = threading.Event()
+
+    def broken():
+        attempts.append(len(scheduler.writing))
+        if len(attempts) == 2:
+            retried.set()
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(scheduler, "connection", broken)
+    scheduler.review("a", learner, 1, "game", "question", True)
+    assert retried.wait(5)
+    monkeypatch.setattr(scheduler, "connection", connection)
+    scheduler.close()
+    assert attempts[:2] == [1, 1]
+
+    rows = sqlite3.connect(str(tmp_path / "srs.db")).execute("SELECT seed FROM items")
+    assert rows.fetchall() == [(1,)]
+
+
+def test_resident_items_bounded(tmp_path):
+    scheduler = srs.Scheduler(str(tmp_path / "srs.db"), max_resident_items=10)
+    for name in "abc":
+        learner = scheduler.load(name)
+        for seed in range(4):
+            scheduler.review(name, learner, seed, "game", "question", True)
+    assert list(scheduler.learners) == ["b", "c"]
+    assert scheduler.resident_items == 8
+    scheduler.close()
+
+    # Evicted learners come back from the database
+    assert len(scheduler.load("a").items) == 4
@@ -0,0 +1,14 @@
+import startup
+
+
+def test_import_within_budget():
+    # Best of three, anything else running on the machine only ever adds time
+    total = min(startup.import_total(startup.import_times()) for _ in range(3)) / 1000
+    assert total <= startup.IMPORT_BUDGET, f"importing main took {total:.0f}ms"
+
+
+def test_first_response_within_budget():
+    elapsed = startup.first_response() * 1000
+    assert elapsed <= startup.FIRST_RESPONSE_BUDGET, (
+        f"first response in {elapsed:.0f}ms"
+    )
@@ -0,0 +1,91 @@
+import base64
+import random
+import time
+
+import pytest
+
+import tokens
+
+
+def next_question(rng):
+    return "game", f"question {rng.random()}", (rng.randint(0, 9),)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Whole seconds, as tokens record the time they were issued in
+    now = [float(int(time.time()))]
+    monkeypatch.setattr(tokens.time, "time", lambda: now[0])
+    return now
+
+
+def tamper(token, index):
+    raw = bytearray(base64.urlsafe_b64decode(token))
+    raw[index] ^= 1
+    return base64.urlsafe_b64encode(bytes(raw)).decode()
+
+
+@pytest.mark.parametrize("mode", [tokens.StatelessTokens, tokens.TokenStore])
+def test_round_trip(mode):
+    if mode is tokens.StatelessTokens:
+        store = mode(next_question, b"secret")
+    else:
+        store = mode(next_question)
+    token, issued = store.issue()
+    assert store.lookup(token) == issued
+    assert issued[:3] == next_question(random.Random(issued.seed))
+
+
+@pytest.mark.parametrize("index", [0, 8, 19, 20, 27], ids=lambda x: f"byte{x}")
+def test_tampered_token_rejected(index):
+    store = tokens.StatelessTokens(next_question, b"secret")
+    token, _ = store.issue()
+    assert store.lookup(tamper(token, index)) is None
+
+
+@pytest.mark.parametrize("token", ["", "not a token", "AAAA", "!" * 38])
+def test_malformed_token_rejected(token):
+    assert tokens.StatelessTokens(next_question, b"secret").lookup(token) is None
+
+
+def test_expired_token_rejected(clock):
+    store = tokens.StatelessTokens(next_question, b"secret", ttl=60)
+    token, _ = store.issue()
+    clock[0] += 60
+    assert store.lookup(token) is not None
+    clock[0] += 1
+    assert store.lookup(token) is None
+
+
+def test_other_version_rejected():
+    old = tokens.StatelessTokens(next_question, b"secret", version=b"1")
+    new = tokens.StatelessTokens(next_question, b"secret", version=b"2")
+    token, _ = old.issue()
+    assert old.lookup(token) is not None
+    assert new.lookup(token) is None
+
+
+def test_other_secret_rejected():
+    token, _ = tokens.StatelessTokens(next_question, b"secret").issue()
+    assert tokens.StatelessTokens(next_question, b"other").lookup(token) is None
+
+
+def test_store_evicts_oldest_beyond_maxsize():
+    store = tokens.TokenStore(next_question, maxsize=3)
+    issued = [store.issue()[0] for _ in range(5)]
+    assert len(store.entries) == 3
+    assert [store.lookup(x) is not None for x in issued] == [False] * 2 + [True] * 3
+
+
+def test_store_evicts_expired(clock):
+    store = tokens.TokenStore(next_question, ttl=60)
+    first, _ = store.issue()
+    clock[0] += 30
+    second, _ = store.issue()
+    clock[0] += 31
+    assert store.lookup(first) is None
+    assert store.lookup(second) is not None
+    assert list(store.entries) == [second]
+    clock[0] += 30
+    assert store.lookup(second) is None
+    assert not store.entries
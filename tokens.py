@@ -0,0 +1,119 @@
+"""
+Question tokens.
+
+Each rendered question gets a short token instead of its answers, and grading looks the
+answers up from the token. Two interchangeable modes:
+
+- StatelessTokens: the token is the random seed the question was drawn with (plus the time
+  it was issued), encrypted and signed with a secret. Looking it up draws the same question
+  again from the seed, so any worker that shares the secret (and question bank) can grade it.
+  The key is derived from the secret and a version of what seeds draw from (the bank, or the
+  games), so tokens issued for other questions are rejected rather than graded against the
+  question their seed draws now.
+- TokenStore: the token is a random key into a bounded in-memory store with a TTL, for a
+  single worker.
+"""
+
+import base64
+import hashlib
+import hmac
+import random
+import secrets
+import struct
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+Issued = namedtuple("Issued", ["game", "question", "answers", "issued", "seed"])
+
+
+class StatelessTokens:
+    """
+    Tokens are nonce (8 bytes) | encrypted seed and issue time (12 bytes) | tag (8 bytes),
+    base64url encoded. The keystream and tag are both HMAC-SHA256 with the secret.
+    """
+
+    def __init__(self, next_question, secret, ttl=86400, version=b""):
+        self.next_question = next_question
+        self.key = hashlib.sha256(secret + b"\0" + version).digest()
+        self.ttl = ttl
+
+    def mac(self, prefix, data):
+        return hmac.new(self.key, prefix + data, hashlib.sha256).digest()
+
+    def issue(self, seed=None):
+        """
+        Draws a question (with `seed`, or a random one), returning (token, Issued).
+        """
+        if seed is None:
+            seed = random.getrandbits(64)
+        issued = int(time.time())
+        nonce = secrets.token_bytes(8)
+        keystream = self.mac(b"k", nonce)
+        payload = bytes(
+            a ^ b for a, b in zip(struct.pack("<QI", seed, issued), keystream)
+        )
+        tag = self.mac(b"t", nonce + payload)[:8]
+        token = base64.urlsafe_b64encode(nonce + payload + tag).decode()
+        return token, Issued(*self.next_question(random.Random(seed)), issued, seed)
+
+    def lookup(self, token):
+        """
+        Returns the Issued question for a token, or None if it's invalid or expired.
+        """
+        try:
+            raw = base64.urlsafe_b64decode(token)
+        except ValueError:
+            return None
+        if len(raw) != 28:
+            return None
+        nonce, payload, tag = raw[:8], raw[8:20], raw[20:]
+        if not hmac.compare_digest(tag, self.mac(b"t", nonce + payload)[:8]):
+            return None
+        keystream = self.mac(b"k", nonce)
+        seed, issued = struct.unpack(
+            "<QI", bytes(a ^ b for a, b in zip(payload, keystream))
+        )
+        if issued + self.ttl < time.time():
+            return None
+        return Issued(*self.next_question(random.Random(seed)), issued, seed)
+
+
+class TokenStore:
+    """
+    Random tokens kept in memory for `ttl` seconds, holding at most `maxsize` questions
+    (the oldest are dropped first).
+    """
+
+    def __init__(self, next_question, maxsize=100000, ttl=3600):
+        self.next_question = next_question
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def issue(self, seed=None):
+        if seed is None:
+            seed = random.getrandbits(64)
+        token = secrets.token_urlsafe(12)
+        issued = Issued(
+            *self.next_question(random.Random(seed)), int(time.time()), seed
+        )
+        with self.lock:
+            self.entries[token] = issued
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return token, issued
+
+    def lookup(self, token):
+        with self.lock:
+            issued = self.entries.get(token)
+            # Entries are in issue order, so everything before an expired one has expired too
+            while self.entries:
+                oldest = next(iter(self.entries.values()))
+                if oldest.issued + self.ttl >= time.time():
+                    break
+                self.entries.popitem(last=False)
+        if issued is None or issued.issued + self.ttl < time.time():
+            return None
+        return issued